@@ -0,0 +1,143 @@
+import os
+from typing import Annotated
+
+from fastapi import APIRouter, Security, HTTPException, Depends, Query
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, PlainTextResponse
+
+from api.data.auth_data import User
+from api.data.general import return_success_response_with_data, return_success_response
+from utils.database.async_database import AsyncDatabase, get_async_db
+from utils.database.database import Database, DATABASE_NAME
+from utils.database.indexes import index_report
+from utils.error_handler.error_catalog import error_catalog
+from utils.environment.settings import reload_settings, SettingsException
+from utils.image.renditions import get_rendition_service
+from utils.notification.email_sender import get_email_sender
+from utils.profiling.request_profiler import get_profile_store, ProfileNotFoundException
+from utils.security.authenticate import get_current_user
+from utils.security.password_hasher import get_password_hasher
+from utils.security.token_cache import token_cache, flush_token_cache
+from utils.security.user_cache import user_cache
+from utils.security.scopes import UserScopes
+from utils.storage.blob_gc import collect_blobs
+from utils.video.thumbnail_jobs import get_thumbnail_workers, thumbnail_job_counts
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/indexes")
+async def get_index_report(
+        current_user: Annotated[User, Security(get_current_user
+            , scopes=[UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value])],
+):
+    report = await run_in_threadpool(index_report, Database(DATABASE_NAME))
+    return return_success_response_with_data(report)
+
+
+@router.get("/cache")
+async def get_cache_stats(
+        current_user: Annotated[User, Security(get_current_user
+            , scopes=[UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value])],
+):
+    return return_success_response_with_data({"users": user_cache.stats(),
+                                              "tokens": token_cache.stats(),
+                                              "renditions": get_rendition_service().stats()})
+
+
+@router.post("/cache/tokens/flush")
+async def flush_tokens(
+        current_user: Annotated[User, Security(get_current_user
+            , scopes=[UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value])],
+):
+    flush_token_cache()
+    return return_success_response()
+
+
+@router.post("/settings/reload")
+async def reload_configuration(
+        current_user: Annotated[User, Security(get_current_user
+            , scopes=[UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value])],
+):
+    try:
+        await run_in_threadpool(reload_settings)
+    except SettingsException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return return_success_response()
+
+
+@router.get("/password-hasher")
+async def get_password_hasher_stats(
+        current_user: Annotated[User, Security(get_current_user
+            , scopes=[UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value])],
+):
+    return return_success_response_with_data(get_password_hasher().stats())
+
+
+@router.get("/email")
+async def get_email_stats(
+        current_user: Annotated[User, Security(get_current_user
+            , scopes=[UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value])],
+):
+    return return_success_response_with_data(get_email_sender().stats())
+
+
+@router.post("/error-messages/reload")
+async def reload_error_messages(
+        current_user: Annotated[User, Security(get_current_user
+            , scopes=[UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+):
+    await error_catalog.refresh(db)
+    return return_success_response_with_data(error_catalog.stats())
+
+
+@router.get("/thumbnail-jobs")
+async def get_thumbnail_job_stats(
+        current_user: Annotated[User, Security(get_current_user
+            , scopes=[UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+):
+    workers = get_thumbnail_workers()
+    return return_success_response_with_data({"queue": await thumbnail_job_counts(db),
+                                              "workers": workers.stats() if workers is not None else None})
+
+
+@router.post("/blobs/gc")
+async def collect_unused_blobs(
+        current_user: Annotated[User, Security(get_current_user
+            , scopes=[UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+):
+    return return_success_response_with_data({"removed": await collect_blobs(db)})
+
+
+@router.get("/profiles")
+async def list_profiles(
+        current_user: Annotated[User, Security(get_current_user
+            , scopes=[UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value])],
+):
+    return return_success_response_with_data({"items": await run_in_threadpool(get_profile_store().list)})
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(
+        profile_id: str,
+        current_user: Annotated[User, Security(get_current_user
+            , scopes=[UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value])],
+        format: str = Query("pstats", pattern="^(pstats|text)$"),
+):
+    """
+    pstats is the raw cProfile dump for snakeviz or flameprof, text the top
+    functions by cumulative time.
+    """
+    store = get_profile_store()
+    try:
+        if format == "text":
+            return PlainTextResponse(await run_in_threadpool(store.summary, profile_id))
+        path = store.path(profile_id)
+    except ProfileNotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} does not exist")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.pstats")
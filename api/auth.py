@@ -1,20 +1,21 @@
 from datetime import timedelta, datetime
-from typing import List, Any
+from typing import List, Any, Dict
 from fastapi import APIRouter, HTTPException, Depends, Security
 from fastapi.security import OAuth2PasswordRequestForm
 from typing_extensions import Annotated
 from api.data.auth_data import User, Token
 from utils.constants.collection_name import CollectionName
 from utils.constants.user_types import get_user_type_from_scope
-from utils.database.database import Database, get_db
+from utils.database.async_database import AsyncDatabase, get_async_db
 from utils.environment.environment_manager import EnvironmentManager, get_environment_manager
 from utils.error_handler.error_codes import ErrorCode
 from utils.error_handler.response_handler import return_error_message
 from utils.notification.send_email import send_email_notification, OTPNotification
-from utils.security.authenticate import create_access_token, authenticate_user, \
-    get_password_hash, get_current_user
+from utils.security.authenticate import create_access_token, authenticate_user, get_current_user
 from api.data.general import return_success_response, return_success_response_with_data
 from utils.security.otp import generate_otp
+from utils.security.password_hasher import get_password_hasher
+from utils.security.user_cache import invalidate_user
 from utils.security.scopes import UserScopes
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -30,122 +31,123 @@ def create_token(username: str, scopes: List[str], env_manager: EnvironmentManag
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
         form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-        db: Database = Depends(get_db),
+        db: AsyncDatabase = Depends(get_async_db),
         env_manager: EnvironmentManager = Depends(get_environment_manager),
 ):
-    user = authenticate_user(username=form_data.username, password=form_data.password, db=db)
+    user = await authenticate_user(username=form_data.username, password=form_data.password, db=db)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     access_token = create_token(form_data.username, user["scopes"], env_manager)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-def get_user(db: Database, username: str) -> [Any]:
-    return db.get_object(CollectionName.USER.value, {"username": username})
+async def get_user(db: AsyncDatabase, username: str, projection: Dict[str, Any] = None) -> Any:
+    return await db.get_single_object(CollectionName.USER.value, {"username": username}, projection=projection)
 
 
-def get_user_by_oauth2(db: Database, form_data: OAuth2PasswordRequestForm) -> Any:
-    results = get_user(db, form_data.username)
-    if results is None or len(results) != 0:
+async def get_user_by_oauth2(db: AsyncDatabase, form_data: OAuth2PasswordRequestForm) -> Any:
+    if await db.exists(CollectionName.USER.value, {"username": form_data.username}):
         raise HTTPException(status_code=400, detail="User is already exist")
 
 
-def add_user_with_scopes(db: Database,
-                         username: str,
-                         password: str,
-                         scopes: List[str],
-                         email: str,
-                         fullname: str):
-    object_id = db.insert_object(CollectionName.USER.value,
-                                 User(username=username,
-                                      email=email,
-                                      fullname=fullname,
-                                      password=get_password_hash(password),
-                                      scopes=scopes).__dict__)
+async def add_user_with_scopes(db: AsyncDatabase,
+                               username: str,
+                               password: str,
+                               scopes: List[str],
+                               email: str,
+                               fullname: str):
+    password_hash = await get_password_hasher().hash(password)
+    object_id = await db.insert_object(CollectionName.USER.value,
+                                       User(username=username,
+                                            email=email,
+                                            fullname=fullname,
+                                            password=password_hash,
+                                            scopes=scopes).__dict__)
     if object_id is None:
         raise HTTPException(status_code=400, detail="Database error")
 
 
 @router.post("/register/moderator/master")
-def register_as_moderator_master(
+async def register_as_moderator_master(
         fullname: str,
         email: str,
         form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
         current_user: Annotated[User, Security(get_current_user
             , scopes=[UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value])],
-        db: Database = Depends(get_db)
+        db: AsyncDatabase = Depends(get_async_db)
 ):
-    get_user_by_oauth2(db, form_data)
-    add_user_with_scopes(db, form_data.username, form_data.password,
+    await get_user_by_oauth2(db, form_data)
+    await add_user_with_scopes(db, form_data.username, form_data.password,
                          [UserScopes.MODERATOR.value, UserScopes.MASTER_MODERATOR.value, UserScopes.USER.value]
                          , email, fullname)
     return return_success_response()
 
 
 @router.post("/register/moderator")
-def register_as_moderator_master(
+async def register_as_moderator_master(
         fullname: str,
         email: str,
         form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
         current_user: Annotated[User, Security(get_current_user
             , scopes=[UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value])],
-        db: Database = Depends(get_db)
+        db: AsyncDatabase = Depends(get_async_db)
 ):
-    get_user_by_oauth2(db, form_data)
-    add_user_with_scopes(db, form_data.username, form_data.password,
+    await get_user_by_oauth2(db, form_data)
+    await add_user_with_scopes(db, form_data.username, form_data.password,
                          [UserScopes.MODERATOR.value, UserScopes.USER.value], email, fullname)
     return return_success_response()
 
 
 @router.post("/register", response_model=Token)
-def register(
+async def register(
         email: str,
         fullname: str,
         form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-        db: Database = Depends(get_db),
+        db: AsyncDatabase = Depends(get_async_db),
         env_manager: EnvironmentManager = Depends(get_environment_manager)
 ):
-    get_user_by_oauth2(db, form_data)
+    await get_user_by_oauth2(db, form_data)
     scopes = [UserScopes.USER.value]
-    add_user_with_scopes(db, form_data.username, form_data.password, scopes, email, fullname)
+    await add_user_with_scopes(db, form_data.username, form_data.password, scopes, email, fullname)
     access_token = create_token(form_data.username, scopes, env_manager)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.post("/assign/moderator")
-def assign_someone_as_moderator(
+async def assign_someone_as_moderator(
         username: str,
         current_user: Annotated[User, Security(get_current_user
             , scopes=[UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value])],
-        db: Database = Depends(get_db),
+        db: AsyncDatabase = Depends(get_async_db),
 ):
-    users = get_user(db, username)
-    if users is None or len(users) == 0:
+    user_obj = await get_user(db, username)
+    if user_obj is None:
         raise HTTPException(status_code=502, detail="User is not exist")
-    user = User(**users[0])
+    user = User(**user_obj)
     user.scopes.append(UserScopes.MODERATOR.value)
-    updated_count = db.update_object(CollectionName.USER.value, {"username": user.username}, user.__dict__)
+    updated_count = await db.update_object(CollectionName.USER.value, {"username": user.username}, user.__dict__)
+    invalidate_user(user.username)
     if updated_count == 0:
         raise HTTPException(status_code=502, detail="User cannot be updated")
     return return_success_response()
 
 
 @router.post("/forget/password/{username}")
-def forget_password(
+async def forget_password(
         username: str,
-        db: Database = Depends(get_db),
+        db: AsyncDatabase = Depends(get_async_db),
         env_manager: EnvironmentManager = Depends(get_environment_manager)
 ):
-    users = get_user(db, username)
-    if users is None or len(users) == 0:
+    user = await get_user(db, username, projection={"email": 1})
+    if user is None:
         raise HTTPException(status_code=502, detail="User is not exist")
-    user = User(**users[0])
     current_time = datetime.utcnow()
-    reset_request = db.get_single_object(
+    reset_request = await db.get_single_object(
         CollectionName.PASSWORD_RESET_REQUESTS.value,
-        {"user_id": users[0]['_id']}
+        {"user_id": user['_id']},
+        projection={"last_password_change": 1}
     )
     if reset_request:
         last_change = reset_request.get('last_password_change')
@@ -153,9 +155,9 @@ def forget_password(
             return return_success_response()
     otp_code = generate_otp(env_manager)
     expiry_time = current_time + timedelta(hours=2)
-    db.update_object(
+    await db.update_object(
         "PasswordResetRequests",
-        {"user_id": users[0]['_id']},
+        {"user_id": user['_id']},
         {
             "reset_otp": otp_code,
             "otp_expiry": expiry_time,
@@ -165,37 +167,36 @@ def forget_password(
         },
         upsert=True
     )
-    send_email_notification(
-        user.email,
-        OTPNotification("Your password reset code", "OTP Code", otp_code),
-    )
+    send_email_notification(user["email"], OTPNotification("Your password reset code", "OTP Code", otp_code))
     return return_success_response()
 
 
 @router.post("/forget/password/verify")
-def otp_verify(
+async def otp_verify(
         current_user: Annotated[User, Depends(get_current_user)],
         otp_code: str,
         new_password: str,
-        db: Database = Depends(get_db)
+        db: AsyncDatabase = Depends(get_async_db)
 ):
-    reset_request = db.get_single_object(
+    reset_request = await db.get_single_object(
         CollectionName.PASSWORD_RESET_REQUESTS.value,
-        {"user_id": current_user["_id"]}
+        {"user_id": current_user["_id"]},
+        projection={"reset_otp": 1, "otp_expiry": 1, "password_changed": 1}
     )
     if not reset_request:
-        return return_error_message(db, ErrorCode.RESET_REQUEST_NOT_FOUND)
+        return return_error_message(ErrorCode.RESET_REQUEST_NOT_FOUND)
 
     current_time = datetime.utcnow()
     if (reset_request['reset_otp'] == otp_code and
             reset_request['otp_expiry'] > current_time and
             not reset_request['password_changed']):
-        db.update_object(
+        await db.update_object(
             CollectionName.USER.value,
             {"_id": current_user['_id']},
-            {"password": get_password_hash(new_password), }
+            {"password": await get_password_hasher().hash(new_password), }
         )
-        db.update_object(
+        invalidate_user(current_user["username"])
+        await db.update_object(
             "PasswordResetRequests",
             {"user_id": current_user['_id']},
             {
@@ -205,11 +206,11 @@ def otp_verify(
         )
         return return_success_response()
     else:
-        return return_error_message(db, ErrorCode.INVALID_OTP_OR_EXPIRED)
+        return return_error_message(ErrorCode.INVALID_OTP_OR_EXPIRED)
 
 
 @router.post("/type")
-def get_user_type(
+async def get_user_type(
         current_user: Annotated[User, Depends(get_current_user)],
 ):
     scopes = current_user["scopes"]
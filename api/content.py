@@ -1,23 +1,50 @@
-from typing import Annotated, List
+from functools import partial
+from typing import Annotated
 
-from fastapi import APIRouter, Security, Depends
+from fastapi import APIRouter, Security, Depends, HTTPException, Query
 
 from api.data.auth_data import User
-from api.data.content_data import ImageUpload
-from api.data.general import return_success_response_with_data
+from api.data.content_data import ImageUpload, GetContentResponse
+from api.data.general import BaseResponse, Page, return_success_page_json, document_fields
 from utils.constants.collection_name import CollectionName
-from utils.database.database import get_db, Database
+from utils.database.async_database import AsyncDatabase, get_async_db
+from utils.database.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorException, PAGE_SORT
+from utils.http.json_response import StreamFormat, stream_response
 from utils.security.authenticate import get_current_user
 from utils.security.scopes import UserScopes
 
 router = APIRouter(prefix="/content", tags=["Content"])
 
+CONTENT_PROJECTION = {field: 1 for field in ImageUpload.model_fields}
 
-@router.get("", response_model=List[ImageUpload])
-def get_content(
+
+@router.get("", response_model=BaseResponse[Page[GetContentResponse]])
+async def get_content(
         current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
-        db: Database = Depends(get_db),
+        db: AsyncDatabase = Depends(get_async_db),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: str = None,
 ):
-    objs = db.get_object(CollectionName.IMAGES.value, {"username": current_user["username"]})
-    return return_success_response_with_data(objs)
+    try:
+        objs, next_cursor = await db.get_page(CollectionName.IMAGES.value,
+                                              {"username": current_user["username"]},
+                                              projection=CONTENT_PROJECTION,
+                                              limit=limit,
+                                              cursor=cursor)
+    except InvalidCursorException:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return return_success_page_json(objs, next_cursor, GetContentResponse)
+
 
+@router.get("/export")
+async def export_content(
+        current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+        format: StreamFormat = StreamFormat.NDJSON,
+):
+    documents = db.iterate_objects(CollectionName.IMAGES.value,
+                                   {"username": current_user["username"]},
+                                   projection=CONTENT_PROJECTION,
+                                   sort=PAGE_SORT)
+    return stream_response(documents, partial(document_fields, fields=list(GetContentResponse.model_fields)),
+                           format, f"content-{current_user['username']}")
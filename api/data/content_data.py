@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, List
 
 from pydantic import BaseModel
 
@@ -11,11 +11,37 @@ class ImageUpload(BaseModel):
     last_modified_date: Optional[str]
     is_image:bool
     file_content_type:Optional[str]
+    file_size: Optional[int] = None
+    file_sha256: Optional[str] = None
+    blob_digest: Optional[str] = None
+    file_name: Optional[str] = None
+    processing_status: Optional[str] = None
+    image_key: Optional[str] = None
+    image_size: Optional[int] = None
+    image_sha256: Optional[str] = None
+    image_content_type: Optional[str] = None
+
+
+class GetContentResponse(ImageUpload):
+    id: Optional[str] = None
 
 
 class GetImageResponse(BaseModel):
     id: Optional[str]
-    image: str
+    image: Optional[str] = None
     username: Optional[str]
     upload_time: Optional[str]
     last_modified_date: Optional[str]
+    processing_status: Optional[str] = None
+    image_size: Optional[int] = None
+    image_content_type: Optional[str] = None
+
+
+class DeleteRequest(BaseModel):
+    ids: List[str]
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    content_type: str
+    size: Optional[int] = None
@@ -1,7 +1,7 @@
-from typing import TypeVar, Generic, List
+from typing import Any, Dict, TypeVar, Generic, List, Optional, Type
 from pydantic import BaseModel
 
-from utils.logger.logger import logger
+from utils.http.json_response import FastJSONResponse
 
 T = TypeVar('T')
 
@@ -12,6 +12,11 @@ class BaseResponse(BaseModel, Generic[T]):
     error_code: int
 
 
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next: Optional[str] = None
+
+
 class Content(BaseModel):
     content: str
     content_id: str
@@ -23,14 +28,19 @@ def return_success_response() -> BaseResponse[dict]:
 
 def include_id_if_exists(data: List[T]) -> List[T]:
     for obj in data:
-        try:
-            if hasattr(obj, "_id") or obj["_id"] is not None:
-                obj["id"] = str(obj["_id"])
-        except Exception as e:
-            logger.error(e)
+        if isinstance(obj, dict) and obj.get("_id") is not None:
+            obj["id"] = str(obj["_id"])
     return data
 
 
+def document_fields(obj: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    # What the response model would keep, with the id taken from _id; the encoder converts the values
+    item = {field: obj.get(field) for field in fields}
+    if "id" in item and obj.get("_id") is not None:
+        item["id"] = obj["_id"]
+    return item
+
+
 def return_success_response_with_data(data: T) -> BaseResponse[T]:
     is_list = True
     if type(data) is list:
@@ -39,3 +49,22 @@ def return_success_response_with_data(data: T) -> BaseResponse[T]:
         is_list = False
         data = include_id_if_exists([data])
     return BaseResponse[T](error=False, data=data if is_list else data[0], error_code=-1)
+
+
+def return_success_page_response(items: List[T], next_cursor: Optional[str]) -> BaseResponse[dict]:
+    return BaseResponse[dict](error=False, data={"items": include_id_if_exists(items), "next": next_cursor},
+                              error_code=-1)
+
+
+def return_success_page_json(items: List[Dict[str, Any]], next_cursor: Optional[str],
+                             model: Type[BaseModel]) -> FastJSONResponse:
+    """
+    The same envelope as return_success_page_response for a route whose
+    response_model pages `model`, encoded in one pass over the documents.
+    The route's response_model still documents it, FastAPI does not validate
+    a returned response.
+    """
+    fields = list(model.model_fields)
+    return FastJSONResponse({"error": False,
+                             "data": {"items": [document_fields(obj, fields) for obj in items], "next": next_cursor},
+                             "error_code": -1})
@@ -1,66 +1,304 @@
+import hashlib
+import os
+from functools import partial
 from datetime import datetime, date
-from typing import Annotated, Dict, Any, List
+from typing import Annotated, Dict, Any, List, Optional
 
-from bson import ObjectId
-from fastapi import APIRouter, Depends, Security, HTTPException
+from fastapi import APIRouter, Depends, Security, HTTPException, Query, Header, UploadFile, File
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, FileResponse, StreamingResponse
 
 from api.data.auth_data import User
-from api.data.content_data import ImageUpload, GetImageResponse
-from api.data.general import return_success_response, BaseResponse, return_success_response_with_data
+from api.data.content_data import ImageUpload, GetImageResponse, DeleteRequest
+from api.data.general import return_success_response, BaseResponse, Page, return_success_page_json, \
+    return_success_response_with_data, document_fields
 from utils.constants.collection_name import CollectionName
-from utils.database.database import Database, get_db
+from utils.constants.processing_status import ProcessingStatus
+from utils.database.async_database import AsyncDatabase, get_async_db
+from utils.database.object_ids import to_object_ids, InvalidObjectIdException, path_object_id
+from utils.database.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorException, PAGE_SORT
+from utils.http.conditional import etag_matches
+from utils.http.json_response import StreamFormat, stream_response
+from utils.image.image_to_base64 import base64_to_bytes
 from utils.image.image_to_database import image_to_database
+from utils.image.image_store import IMAGE_CONTENT_PROJECTION, store_base64_image, stored_image_fields, \
+    cleared_image_fields, load_image_bytes, image_digest
+from utils.image.image_type import detect_image_content_type, DEFAULT_CONTENT_TYPE
+from utils.image.renditions import get_rendition_service
 from utils.security.authenticate import get_current_user
 from utils.security.scopes import UserScopes
+from utils.storage.blob_store import get_image_store, BlobNotFoundException
 
 router = APIRouter(prefix="/image", tags=["Image"])
 
+IMAGE_METADATA_PROJECTION = {"username": 1, "upload_time": 1, "last_modified_date": 1, "processing_status": 1,
+                             "image_size": 1, "image_content_type": 1}
+# Only documents the migration has not converted yet still have an inline image
+IMAGE_LIST_PROJECTION = {**IMAGE_METADATA_PROJECTION, "image": 1}
+# Per user data behind a bearer token, only the client's own cache may keep it; ETags make revalidation a 304
+THUMBNAIL_CACHE_CONTROL = "private, max-age=604800"
+MAX_DELETE_IDS = 1000
+MAX_BATCH_UPLOAD = 100
+
 
 @router.post("/")
-def upload_image(
+async def upload_image(
         image: ImageUpload,
         current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
-        db: Database = Depends(get_db),
+        db: AsyncDatabase = Depends(get_async_db),
 ):
     image = image_to_database(current_user, image)
-    obj_id = db.insert_object(CollectionName.IMAGES.value, image.__dict__)
+    obj = await stored_image_document(image)
+    obj_id = await db.insert_object(CollectionName.IMAGES.value, obj)
     if obj_id is None or obj_id == "":
+        await discard_stored_images([obj])
         raise HTTPException(status_code=502, detail="Image cannot be uploaded")
     return return_success_response()
 
 
+@router.post("/file")
+async def upload_image_file(
+        current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+        file: UploadFile = File(...),
+):
+    if not file.content_type or not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File is not an image")
+    # Read from the spooled upload and written to the store a chunk at a time
+    stored = await run_in_threadpool(get_image_store().put, file.file)
+    image = image_to_database(current_user, ImageUpload(image=None, username=None, upload_time=None, file_path=None,
+                                                        last_modified_date=None, is_image=True,
+                                                        file_content_type=file.content_type))
+    obj = {**image.__dict__, **stored_image_fields(stored, file.content_type)}
+    obj_id = await db.insert_object(CollectionName.IMAGES.value, obj)
+    if obj_id is None or obj_id == "":
+        await discard_stored_images([obj])
+        raise HTTPException(status_code=502, detail="Image cannot be uploaded")
+    return return_success_response_with_data({"id": str(obj_id), "size": stored.size})
+
+
+async def stored_image_document(image: ImageUpload) -> Dict[str, Any]:
+    obj = dict(image.__dict__)
+    if image.image:
+        obj.update(await run_in_threadpool(store_base64_image, get_image_store(), image.image))
+    return obj
+
+
+async def discard_stored_images(objs: List[Dict[str, Any]]):
+    # Documents that were never inserted leave their bytes behind otherwise
+    for obj in objs:
+        if obj.get("image_key"):
+            await run_in_threadpool(get_image_store().delete, obj["image_key"])
+
+
+@router.post("/batch")
+async def upload_images(
+        images: List[ImageUpload],
+        current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+        ordered: bool = False,
+):
+    if len(images) > MAX_BATCH_UPLOAD:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_UPLOAD} images can be uploaded at once")
+    objs = [await stored_image_document(image_to_database(current_user, image)) for image in images]
+    obj_ids, errors = await db.insert_objects(CollectionName.IMAGES.value, objs, ordered=ordered)
+    await discard_stored_images([objs[index] for index in errors])
+    results = [{"index": index,
+                "id": str(obj_id) if obj_id is not None else None,
+                "error": errors.get(index)}
+               for index, obj_id in enumerate(obj_ids)]
+    return return_success_response_with_data({"items": results})
+
+
 @router.patch("/update/{id}")
-def update_image(
+async def update_image(
         id: str,
         image: ImageUpload,
         current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
-        db: Database = Depends(get_db),
+        db: AsyncDatabase = Depends(get_async_db),
 ):
-    updated_count = db.update_object(CollectionName.IMAGES.value, {"username": current_user["username"],
-                                                                   "_id": ObjectId(id)},
-                                     {"image": image.image})
+    filter = {"username": current_user["username"], "_id": path_object_id(id)}
+    previous = await db.get_single_object(CollectionName.IMAGES.value, dict(filter), projection={"image_key": 1})
+    new_data = cleared_image_fields()
+    if image.image:
+        new_data = await run_in_threadpool(store_base64_image, get_image_store(), image.image)
+    updated_count = await db.update_object(CollectionName.IMAGES.value, filter, new_data)
     if updated_count is None or updated_count == 0:
+        await discard_stored_images([new_data])
         raise HTTPException(status_code=502, detail="Image cannot be uploaded")
+    if previous is not None:
+        await discard_stored_images([previous])
     return return_success_response()
 
 
 @router.delete("/{id}")
-def delete_image(
+async def delete_image(
         id: str,
         current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
-        db: Database = Depends(get_db),
+        db: AsyncDatabase = Depends(get_async_db),
 ):
-    deleted_count = db.delete_object(CollectionName.IMAGES.value, {"username": current_user["username"],
-                                                                   "_id": ObjectId(id)}, )
+    # Videos share the collection, they are deleted through /video so their blob is released
+    deleted_count = await db.delete_object(CollectionName.IMAGES.value, {"username": current_user["username"],
+                                                                         "_id": path_object_id(id),
+                                                                         "is_image": True},
+                                           deleted_at=datetime.utcnow())
     if deleted_count is None or deleted_count == 0:
         raise HTTPException(status_code=502, detail="Image cannot be uploaded")
     return return_success_response()
 
 
-@router.get("", response_model=BaseResponse[List[GetImageResponse]])
-def get_images(
+@router.delete("")
+async def delete_images(
+        delete_request: DeleteRequest,
+        current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+):
+    if len(delete_request.ids) > MAX_DELETE_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_DELETE_IDS} ids can be deleted at once")
+    try:
+        object_ids = to_object_ids(delete_request.ids)
+    except InvalidObjectIdException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    deleted_count = await db.delete_object(CollectionName.IMAGES.value,
+                                           {"username": current_user["username"], "_id": {"$in": object_ids},
+                                            "is_image": True},
+                                           deleted_at=datetime.utcnow())
+    return return_success_response_with_data({"deleted": deleted_count})
+
+
+@router.get("", response_model=BaseResponse[Page[GetImageResponse]])
+async def get_images(
         current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
-        db: Database = Depends(get_db),
+        db: AsyncDatabase = Depends(get_async_db),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: str = None,
+        metadata_only: bool = False,
+        processing_status: ProcessingStatus = None,
 ):
-    user_images = db.get_object(CollectionName.IMAGES.value, {"username": current_user["username"]})
-    return return_success_response_with_data(user_images)
+    projection = IMAGE_METADATA_PROJECTION if metadata_only else IMAGE_LIST_PROJECTION
+    filter = {"username": current_user["username"]}
+    if processing_status is not None:
+        filter["processing_status"] = processing_status.value
+    try:
+        user_images, next_cursor = await db.get_page(CollectionName.IMAGES.value,
+                                                     filter,
+                                                     projection=projection,
+                                                     limit=limit,
+                                                     cursor=cursor)
+    except InvalidCursorException:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return return_success_page_json(user_images, next_cursor, GetImageResponse)
+
+
+def export_username(current_user: User, username: Optional[str]) -> str:
+    # Admins export any user's library, everyone else only their own
+    if username is None or username == current_user["username"]:
+        return current_user["username"]
+    if not {UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value} & set(current_user["scopes"]):
+        raise HTTPException(status_code=403, detail="Only admins can export another user's images")
+    return username
+
+
+@router.get("/export")
+async def export_images(
+        current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+        format: StreamFormat = StreamFormat.NDJSON,
+        metadata_only: bool = True,
+        processing_status: ProcessingStatus = None,
+        username: str = None,
+):
+    """
+    Every image of the user, newest first, streamed as the cursor is read.
+    """
+    username = export_username(current_user, username)
+    filter = {"username": username}
+    if processing_status is not None:
+        filter["processing_status"] = processing_status.value
+    documents = db.iterate_objects(CollectionName.IMAGES.value,
+                                   filter,
+                                   projection=IMAGE_METADATA_PROJECTION if metadata_only else IMAGE_LIST_PROJECTION,
+                                   sort=PAGE_SORT)
+    return stream_response(documents, partial(document_fields, fields=list(GetImageResponse.model_fields)),
+                           format, f"images-{username}")
+
+
+@router.get("/{id}/thumbnail")
+async def get_thumbnail(
+        id: str,
+        current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+        if_none_match: Annotated[Optional[str], Header()] = None,
+        size: Optional[int] = None,
+):
+    """
+    Without size the stored image is returned as is, with one of the configured
+    sizes a resized WebP or JPEG rendition.
+    """
+    renditions = get_rendition_service()
+    if size is not None and size not in renditions.sizes:
+        raise HTTPException(status_code=400,
+                            detail=f"size must be one of {', '.join(str(size) for size in renditions.sizes)}")
+    obj = await db.get_single_object(CollectionName.IMAGES.value,
+                                     {"username": current_user["username"], "_id": path_object_id(id)},
+                                     projection=IMAGE_CONTENT_PROJECTION)
+    if obj is None or not (obj.get("image_key") or obj.get("image")):
+        raise HTTPException(status_code=404, detail="Thumbnail cannot be found")
+    if size is None:
+        return await image_response(obj, if_none_match)
+    sha256 = await run_in_threadpool(image_digest, obj)
+    etag = renditions.etag(sha256, size)
+    headers = {"ETag": etag, "Cache-Control": THUMBNAIL_CACHE_CONTROL, "Vary": "Authorization"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    try:
+        rendition = await renditions.get(sha256, size, partial(load_image_bytes, get_image_store(), obj))
+    except BlobNotFoundException:
+        raise HTTPException(status_code=404, detail="Thumbnail cannot be found")
+    return Response(content=rendition, media_type=renditions.media_type, headers=headers)
+
+
+@router.get("/{id}/content")
+async def get_image_content(
+        id: str,
+        current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+        if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    obj = await db.get_single_object(CollectionName.IMAGES.value,
+                                     {"username": current_user["username"], "_id": path_object_id(id),
+                                      "is_image": True},
+                                     projection=IMAGE_CONTENT_PROJECTION)
+    if obj is None:
+        raise HTTPException(status_code=404, detail="Image cannot be found")
+    return await image_response(obj, if_none_match)
+
+
+async def image_response(obj: Dict[str, Any], if_none_match: Optional[str]) -> Response:
+    """
+    Stored images are streamed from the blob store, a file backed store hands
+    the file to FileResponse. Documents the migration has not reached yet
+    still carry the base64 payload.
+    """
+    if obj.get("image_key"):
+        etag = f'"{obj["image_sha256"][:32]}"'
+        headers = {"ETag": etag, "Cache-Control": THUMBNAIL_CACHE_CONTROL, "Vary": "Authorization"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        store = get_image_store()
+        media_type = obj.get("image_content_type") or DEFAULT_CONTENT_TYPE
+        local_path = store.local_path(obj["image_key"])
+        if local_path is not None:
+            if not await run_in_threadpool(os.path.exists, local_path):
+                raise HTTPException(status_code=404, detail="Image cannot be found")
+            return FileResponse(local_path, media_type=media_type, headers=headers)
+        headers["Content-Length"] = str(obj["image_size"])
+        return StreamingResponse(store.iter_chunks(obj["image_key"]), media_type=media_type, headers=headers)
+    if not obj.get("image"):
+        raise HTTPException(status_code=404, detail="Image cannot be found")
+    thumbnail = base64_to_bytes(obj["image"])
+    etag = f'"{hashlib.sha256(thumbnail).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": THUMBNAIL_CACHE_CONTROL, "Vary": "Authorization"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=thumbnail, media_type=detect_image_content_type(thumbnail), headers=headers)
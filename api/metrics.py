@@ -0,0 +1,31 @@
+import hmac
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, HTTPException, Header, status
+from starlette.responses import Response
+
+from utils.environment.settings import get_settings
+from utils.metrics import runtime_metrics  # noqa: F401, registers the scrape time gauges
+from utils.metrics.registry import REGISTRY, CONTENT_TYPE
+from utils.security.token_cache import bearer_token, is_admin_token
+
+router = APIRouter(tags=["Metrics"])
+
+
+def is_metrics_scraper(authorization: Optional[str], metrics_token: Optional[str]) -> bool:
+    # Prometheus sends METRICS_TOKEN as its bearer token, an admin can read the page with their own token
+    token = bearer_token(authorization)
+    if metrics_token and token is not None and hmac.compare_digest(token.encode(), metrics_token.encode()):
+        return True
+    return is_admin_token(authorization)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: Annotated[Optional[str], Header()] = None):
+    settings = get_settings()
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_metrics_scraper(authorization, settings.metrics_token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated",
+                            headers={"WWW-Authenticate": "Bearer"})
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
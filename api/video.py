@@ -1,91 +1,369 @@
-from datetime import date
-from typing import Annotated
+from datetime import date, datetime, timedelta
+from typing import Annotated, Optional
 
 import bson
-from PIL import Image
 from bson import ObjectId
-from fastapi import APIRouter, File, HTTPException, UploadFile, Depends, Security
-from starlette.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Depends, Security, Header, Request
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.responses import FileResponse, Response
 import os
+import uuid
 
 from api.data.auth_data import User
-from api.data.content_data import ImageUpload
+from api.data.content_data import ImageUpload, DeleteRequest, UploadSessionCreate
 from api.data.general import return_success_response, return_success_response_with_data
 from utils.constants.collection_name import CollectionName
-from utils.database.database import Database, get_db
-from utils.image.image_to_base64 import image_to_base64
+from utils.constants.processing_status import ProcessingStatus
+from utils.database.async_database import AsyncDatabase, get_async_db
+from utils.database.object_ids import to_object_ids, InvalidObjectIdException, path_object_id
+from utils.environment.settings import get_settings
+from utils.http.conditional import etag_matches, not_modified_since
+from utils.logger.logger import logger
 from utils.security.authenticate import get_current_user
 from utils.security.scopes import UserScopes
-from utils.video.thumbnail import extract_thumbnail
+from utils.video.blob_store import video_blob_store
+from utils.video.thumbnail_jobs import enqueue_thumbnail_job
+from utils.video.upload import (stream_multipart_to_file, UploadTooLargeException, InvalidUploadException, StoredUpload,
+                                MULTIPART_OVERHEAD_BYTES)
+from utils.video.upload_sessions import PartFileWriter, file_sha256, truncate_part_file, UNLOCKED
 
 router = APIRouter(prefix="/video", tags=["Video"])
 
 UPLOAD_DIR = "uploaded_videos"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+SESSION_DIR = os.path.join(UPLOAD_DIR, ".sessions")
+SESSION_LOCK_SECONDS = 10 * 60
+MAX_DELETE_IDS = 1000
+# Cached per user and revalidated on every use, a revalidation is a 304 without the body
+VIDEO_CACHE_CONTROL = "private, no-cache"
+NOT_MODIFIED_HEADERS = ("etag", "last-modified", "cache-control", "vary")
+VIDEO_FILE_PROJECTION = {"file_path": 1, "blob_digest": 1, "file_name": 1, "file_content_type": 1, "file_sha256": 1}
+os.makedirs(SESSION_DIR, exist_ok=True)
 
 
-@router.post("")
+UPLOAD_OPENAPI = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object", "required": ["file"], "properties": {"file": {"type": "string", "format": "binary"}}}}}}}
+
+
+@router.post("", openapi_extra=UPLOAD_OPENAPI)
 async def upload_video(
+        request: Request,
         current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
-        db: Database = Depends(get_db),
-        file: UploadFile = File(...),
+        db: AsyncDatabase = Depends(get_async_db),
 ):
-    # Check the file type
-    if not file.content_type.startswith("video/"):
-        raise HTTPException(status_code=400, detail="File is not a video")
+    """
+    The body is parsed from the request stream rather than by a File
+    parameter, which would spool it to disk first. The video goes straight
+    to the blob store's temporary path, hashed as it arrives, and the store
+    moves it in place once the digest is known. A declared Content-Length
+    over the limit is refused before anything is read.
+    """
+    settings = get_settings()
+    max_bytes = settings.video_max_upload_bytes
+    content_length = request.headers.get("content-length", "")
+    if max_bytes and content_length.isdigit() and int(content_length) > max_bytes + MULTIPART_OVERHEAD_BYTES:
+        raise HTTPException(status_code=413, detail="Video is too large")
+    try:
+        received = await stream_multipart_to_file(request.stream(), request.headers.get("content-type", ""), "file",
+                                                  video_blob_store.temp_path(), max_bytes,
+                                                  settings.video_upload_chunk_bytes)
+    except UploadTooLargeException:
+        raise HTTPException(status_code=413, detail="Video is too large")
+    except InvalidUploadException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filename = os.path.basename(received.filename or "video")
+    obj_id = await save_video_record(db, current_user, filename, received.content_type, received.stored)
+    return return_success_response_with_data({"id": str(obj_id),
+                                              "filename": filename,
+                                              "processing_status": ProcessingStatus.PROCESSING.value})
+
 
-    # Create a path for saving the file
-    user_upload_dir = os.path.join(UPLOAD_DIR, current_user["username"])
-    os.makedirs(user_upload_dir, exist_ok=True)
-    file_path = os.path.join(user_upload_dir, file.filename)
-
-    # Save the file
-    with open(file_path, "wb") as buffer:
-        buffer.write(await file.read())
-    # Extract and convert thumbnail to Base64
-    thumbnail_buffer = extract_thumbnail(file_path)
-    thumbnail_image = Image.open(thumbnail_buffer)
-    thumbnail_base64 = image_to_base64(thumbnail_image)
+async def save_video_record(db: AsyncDatabase, current_user: User, filename: str, content_type: str,
+                            stored: StoredUpload):
+    # The thumbnail is extracted by the job queue, the record shows up as processing until then
+    path = await video_blob_store.add(db, stored.path, stored.sha256, stored.size)
     image = ImageUpload(
         username=current_user["username"],
         upload_time=date.today().isoformat(),
         last_modified_date=date.today().isoformat(),
-        image=thumbnail_base64,
-        file_path=file_path,
+        image=None,
+        file_path=None,
         is_image=False,
-        file_content_type=file.content_type
+        file_content_type=content_type,
+        file_size=stored.size,
+        file_sha256=stored.sha256,
+        blob_digest=stored.sha256,
+        file_name=filename,
+        processing_status=ProcessingStatus.PROCESSING.value
     )
-    obj_id = db.insert_object(CollectionName.IMAGES.value, image.__dict__)
+    obj_id = await db.insert_object(CollectionName.IMAGES.value, image.__dict__)
     if obj_id is None or obj_id == "":
+        await video_blob_store.release(db, stored.sha256)
         raise HTTPException(status_code=502, detail="Image cannot be uploaded")
-    return return_success_response_with_data({"filename": file.filename})
+    await enqueue_thumbnail_job(db, obj_id, path)
+    return obj_id
+
+
+def video_file_path(obj) -> Optional[str]:
+    # Records from before the blob store carry their own path
+    if obj.get("blob_digest"):
+        return video_blob_store.path(obj["blob_digest"])
+    return obj.get("file_path")
+
+
+def video_file_name(obj) -> str:
+    return obj.get("file_name") or os.path.basename(video_file_path(obj))
+
+
+def remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def release_video_file(db: AsyncDatabase, obj):
+    if obj.get("blob_digest"):
+        await video_blob_store.release(db, obj["blob_digest"])
+    elif obj.get("file_path"):
+        await run_in_threadpool(remove_file, obj["file_path"])
+
+
+@router.get("/{file_id}/status")
+async def get_processing_status(
+        file_id: str,
+        current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+):
+    obj = await db.get_single_object(CollectionName.IMAGES.value,
+                                     {"_id": path_object_id(file_id), "username": current_user["username"]},
+                                     projection={"processing_status": 1, "processing_error": 1})
+    if obj is None:
+        raise HTTPException(status_code=404, detail="File cannot be found")
+    return return_success_response_with_data({"id": file_id,
+                                              "processing_status": obj.get("processing_status"),
+                                              "processing_error": obj.get("processing_error")})
+
+
+def session_response(session) -> dict:
+    return {"id": str(session["_id"]),
+            "offset": session["offset"],
+            "size": session.get("size"),
+            "expires_at": session["expires_at"].isoformat()}
+
+
+async def get_upload_session(db: AsyncDatabase, current_user: User, session_id: str):
+    session = await db.get_single_object(CollectionName.UPLOAD_SESSIONS.value,
+                                         {"_id": path_object_id(session_id), "username": current_user["username"]})
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload session cannot be found")
+    return session
+
+
+def create_empty_file(path: str):
+    open(path, "wb").close()
+
+
+@router.post("/uploads")
+async def create_upload_session(
+        upload: UploadSessionCreate,
+        current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+):
+    if not upload.content_type.startswith("video/"):
+        raise HTTPException(status_code=400, detail="File is not a video")
+    settings = get_settings()
+    if settings.video_max_upload_bytes and upload.size is not None and upload.size > settings.video_max_upload_bytes:
+        raise HTTPException(status_code=413, detail="Video is too large")
+    session_id = ObjectId()
+    part_path = os.path.join(SESSION_DIR, f"{session_id}.part")
+    await run_in_threadpool(create_empty_file, part_path)
+    session = {
+        "_id": session_id,
+        "username": current_user["username"],
+        "filename": os.path.basename(upload.filename),
+        "content_type": upload.content_type,
+        "size": upload.size,
+        "offset": 0,
+        "part_path": part_path,
+        "locked_until": UNLOCKED,
+        "expires_at": datetime.utcnow() + timedelta(seconds=settings.upload_session_ttl_seconds),
+    }
+    await db.insert_object(CollectionName.UPLOAD_SESSIONS.value, session)
+    return return_success_response_with_data(session_response(session))
+
+
+@router.get("/uploads/{session_id}")
+async def get_upload_offset(
+        session_id: str,
+        current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+):
+    session = await get_upload_session(db, current_user, session_id)
+    return return_success_response_with_data(session_response(session))
+
+
+@router.patch("/uploads/{session_id}")
+async def upload_chunk(
+        session_id: str,
+        request: Request,
+        current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
+        upload_offset: Annotated[int, Header()],
+        db: AsyncDatabase = Depends(get_async_db),
+):
+    session = await get_upload_session(db, current_user, session_id)
+    if upload_offset != session["offset"]:
+        raise HTTPException(status_code=409, detail="Offset does not match",
+                            headers={"Upload-Offset": str(session["offset"])})
+    # Only one writer per session, the lock expires in case this worker dies mid write
+    now = datetime.utcnow()
+    settings = get_settings()
+    locked = await db.update_object(CollectionName.UPLOAD_SESSIONS.value,
+                                    {"_id": session["_id"], "offset": upload_offset, "locked_until": {"$lt": now}},
+                                    {"locked_until": now + timedelta(seconds=SESSION_LOCK_SECONDS)})
+    if locked == 0:
+        raise HTTPException(status_code=409, detail="Upload session is busy")
+    max_bytes = session["size"] or settings.video_max_upload_bytes
+    writer = PartFileWriter(session["part_path"], upload_offset)
+    try:
+        await writer.write_stream(request.stream(), max_bytes)
+    except UploadTooLargeException:
+        raise HTTPException(status_code=413, detail="Chunk goes past the declared size")
+    except ClientDisconnect:
+        logger.info(f"Upload session {session_id} disconnected, resumable from the stored offset")
+    finally:
+        # What this request wrote counts, even when the client dropped mid chunk
+        await db.update_object(CollectionName.UPLOAD_SESSIONS.value,
+                               {"_id": session["_id"]},
+                               {"offset": upload_offset + writer.written,
+                                "locked_until": UNLOCKED,
+                                "expires_at": datetime.utcnow() + timedelta(
+                                    seconds=settings.upload_session_ttl_seconds)})
+    return return_success_response_with_data({"id": session_id, "offset": upload_offset + writer.written})
+
+
+@router.post("/uploads/{session_id}/finalize")
+async def finalize_upload(
+        session_id: str,
+        current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+):
+    session = await get_upload_session(db, current_user, session_id)
+    if session["offset"] == 0 or (session["size"] is not None and session["offset"] != session["size"]):
+        raise HTTPException(status_code=409, detail="Upload is not complete",
+                            headers={"Upload-Offset": str(session["offset"])})
+    # Locked like a PATCH while hashing and saving, the session only goes once the record exists
+    locked = await db.update_object(CollectionName.UPLOAD_SESSIONS.value,
+                                    {"_id": session["_id"], "offset": session["offset"],
+                                     "locked_until": {"$lt": datetime.utcnow()}},
+                                    {"locked_until": datetime.utcnow() + timedelta(seconds=SESSION_LOCK_SECONDS)})
+    if locked == 0:
+        raise HTTPException(status_code=409, detail="Upload session is busy")
+    try:
+        await run_in_threadpool(truncate_part_file, session["part_path"], session["offset"])
+        sha256 = await run_in_threadpool(file_sha256, session["part_path"])
+        obj_id = await save_video_record(db, current_user, session["filename"], session["content_type"],
+                                         StoredUpload(session["part_path"], session["offset"], sha256))
+    except BaseException:
+        # The client can finalize again, or the sweeper removes the part file once the session expires
+        await db.update_object(CollectionName.UPLOAD_SESSIONS.value, {"_id": session["_id"]},
+                               {"locked_until": UNLOCKED})
+        raise
+    await db.delete_object(CollectionName.UPLOAD_SESSIONS.value, {"_id": session["_id"]},
+                           deleted_at=datetime.utcnow())
+    return return_success_response_with_data({"id": str(obj_id),
+                                              "filename": session["filename"],
+                                              "processing_status": ProcessingStatus.PROCESSING.value})
 
 
 @router.delete("/{file_id}")
 async def delete_video(
         current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
         file_id: str,
-        db: Database = Depends(get_db),
+        db: AsyncDatabase = Depends(get_async_db),
 ):
-    obj = db.get_object(CollectionName.IMAGES.value, {"_id": ObjectId(file_id), "username": current_user["username"]})
-    if len(obj) == 0 or obj is None:
+    filter = {"_id": path_object_id(file_id), "username": current_user["username"], "is_image": False}
+    obj = await db.get_single_object(CollectionName.IMAGES.value, dict(filter), projection=VIDEO_FILE_PROJECTION)
+    if obj is None:
         raise HTTPException(status_code=502, detail="Video cannot be found")
-    video_upload = ImageUpload(**obj[0])
-    if os.path.exists(video_upload.file_path):
-        os.remove(video_upload.file_path)
+    # Only the request that flipped the record releases its blob
+    if await db.delete_object(CollectionName.IMAGES.value, filter, deleted_at=datetime.utcnow()):
+        await release_video_file(db, obj)
     return return_success_response()
 
 
+@router.delete("")
+async def delete_videos(
+        delete_request: DeleteRequest,
+        current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+):
+    if len(delete_request.ids) > MAX_DELETE_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_DELETE_IDS} ids can be deleted at once")
+    try:
+        object_ids = to_object_ids(delete_request.ids)
+    except InvalidObjectIdException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filter = {"username": current_user["username"], "_id": {"$in": object_ids}, "is_image": False}
+    # One update_many for all ids, the marker tells which records this request flipped so a
+    # concurrent delete of the same id cannot release its blob twice
+    deleted_by_request = uuid.uuid4().hex
+    deleted_count = await db.delete_object(CollectionName.IMAGES.value, filter, deleted_at=datetime.utcnow(),
+                                           new_data={"deleted_by_request": deleted_by_request})
+    if deleted_count:
+        objs = await db.get_object(CollectionName.IMAGES.value,
+                                   {"_id": {"$in": object_ids}, "deleted_by_request": deleted_by_request},
+                                   projection=VIDEO_FILE_PROJECTION, show_deleted=True)
+        for obj in objs:
+            await release_video_file(db, obj)
+    return return_success_response_with_data({"deleted": deleted_count})
+
+
 @router.post("/download")
 async def download_file(
         current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
         file_id: str,
-        db: Database = Depends(get_db),
+        db: AsyncDatabase = Depends(get_async_db),
 ):
-    obj = db.get_single_object(CollectionName.IMAGES.value,
-                               {"_id": ObjectId(file_id), "username": current_user["username"]})
-    if obj is None:
+    obj = await db.get_single_object(CollectionName.IMAGES.value,
+                                     {"_id": path_object_id(file_id), "username": current_user["username"]},
+                                     projection=VIDEO_FILE_PROJECTION)
+    if obj is None or not video_file_path(obj):
         raise HTTPException(status_code=502, detail="Video cannot be found")
-    video_upload = ImageUpload(**obj)
-    filename = video_upload.file_path.split("/")[-1]
-    return FileResponse(video_upload.file_path, media_type=video_upload.file_content_type, filename=filename)
+    return FileResponse(video_file_path(obj), media_type=obj.get("file_content_type"), filename=video_file_name(obj))
+
+
+@router.api_route("/{file_id}/download", methods=["GET", "HEAD"])
+async def stream_file(
+        file_id: str,
+        current_user: Annotated[User, Security(get_current_user, scopes=[UserScopes.USER.value])],
+        db: AsyncDatabase = Depends(get_async_db),
+        if_none_match: Annotated[Optional[str], Header()] = None,
+        if_modified_since: Annotated[Optional[str], Header()] = None,
+):
+    """
+    Range, multipart ranges and If-Range are handled by FileResponse, which
+    also hands the file to the server with http.response.pathsend when the
+    server supports it. The content hash makes a strong ETag, older records
+    fall back to the modification time and size.
+    """
+    obj = await db.get_single_object(CollectionName.IMAGES.value,
+                                     {"_id": path_object_id(file_id), "username": current_user["username"]},
+                                     projection=VIDEO_FILE_PROJECTION)
+    if obj is None or not video_file_path(obj):
+        raise HTTPException(status_code=404, detail="Video cannot be found")
+    try:
+        stat_result = await run_in_threadpool(os.stat, video_file_path(obj))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Video cannot be found")
+    headers = {"Cache-Control": VIDEO_CACHE_CONTROL, "Vary": "Authorization"}
+    if obj.get("file_sha256"):
+        headers["ETag"] = f'"{obj["file_sha256"][:32]}"'
+    response = FileResponse(video_file_path(obj), media_type=obj.get("file_content_type"), headers=headers,
+                            filename=video_file_name(obj), stat_result=stat_result,
+                            content_disposition_type="inline")
+    # If-None-Match wins over If-Modified-Since when both are sent
+    if (etag_matches(if_none_match, response.headers["etag"]) if if_none_match
+            else not_modified_since(if_modified_since, stat_result.st_mtime)):
+        return Response(status_code=304, headers={key: response.headers[key] for key in NOT_MODIFIED_HEADERS})
+    return response
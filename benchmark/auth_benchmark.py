@@ -0,0 +1,45 @@
+"""
+Per request auth overhead of get_current_user before and after the verified
+token cache. Run from the repository root: python -m benchmark.auth_benchmark
+"""
+import os
+import timeit
+from datetime import timedelta
+
+os.environ.setdefault("OS", "prod")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from jose import jwt  # noqa: E402
+
+from utils.constants.environment_keys import EnvironmentKeys  # noqa: E402
+from utils.environment.environment_manager import EnvironmentManager  # noqa: E402
+from utils.security.authenticate import create_access_token  # noqa: E402
+from utils.security.token_cache import decode_token, flush_token_cache  # noqa: E402
+
+NUMBER = 20000
+
+
+def decode_without_cache(token: str):
+    # What every request did before: build the environment manager and verify the signature
+    env_manager = EnvironmentManager()
+    return jwt.decode(
+        token,
+        env_manager.get_key(EnvironmentKeys.SECRET_KEY.value),
+        algorithms=[env_manager.get_key(EnvironmentKeys.ALGORITHM.value)]
+    )
+
+
+def main():
+    token = create_access_token({"sub": "benchmark", "scopes": ["user"]}, EnvironmentManager(),
+                                expires_delta=timedelta(hours=8))
+    flush_token_cache()
+    before = timeit.timeit(lambda: decode_without_cache(token), number=NUMBER) / NUMBER
+    after = timeit.timeit(lambda: decode_token(token), number=NUMBER) / NUMBER
+    print(f"jwt.decode per request:   {before * 1e6:8.2f} us")
+    print(f"cached decode_token:      {after * 1e6:8.2f} us")
+    print(f"speedup:                  {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Encoding an image listing page before and after the single pass JSON path.
+Run from the repository root: python -m benchmark.serialization_benchmark
+"""
+import json
+import timeit
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from api.data.content_data import GetImageResponse
+from api.data.general import BaseResponse, Page, return_success_page_response, return_success_page_json
+from utils.http import json_response
+
+SIZES = (1000, 10000)
+REPEAT = 5
+
+
+def documents(count: int):
+    return [{"_id": ObjectId(),
+             "username": "benchmark",
+             "upload_time": datetime.utcnow().isoformat(),
+             "last_modified_date": datetime.utcnow().isoformat(),
+             "processing_status": "ready",
+             "image_size": 48213,
+             "image_content_type": "image/png"}
+            for _ in range(count)]
+
+
+def encode_before(adapter: TypeAdapter, objs) -> bytes:
+    # What FastAPI did with the returned BaseResponse: validate against response_model, jsonable_encoder, json.dumps
+    response = return_success_page_response(objs, None)
+    validated = adapter.validate_python(response.model_dump())
+    content = jsonable_encoder(adapter.dump_python(validated, mode="json"))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_after(objs) -> bytes:
+    return return_success_page_json(objs, None, GetImageResponse).body
+
+
+def best(function) -> float:
+    return min(timeit.repeat(function, number=1, repeat=REPEAT))
+
+
+def main():
+    adapter = TypeAdapter(BaseResponse[Page[GetImageResponse]])
+    encoder = "orjson" if json_response.orjson is not None else "json"
+    for size in SIZES:
+        objs = documents(size)
+        assert json.loads(encode_before(adapter, [dict(obj) for obj in objs])) == json.loads(encode_after(objs))
+        # The old path adds an id key to the documents in place, each run gets fresh copies
+        before = best(lambda: encode_before(adapter, [dict(obj) for obj in objs]))
+        copy_cost = best(lambda: [dict(obj) for obj in objs])
+        after = best(lambda: encode_after(objs))
+        before -= copy_cost
+        print(f"{size:>6} items, response_model + jsonable_encoder: {before * 1e3:8.2f} ms")
+        print(f"{size:>6} items, single pass {encoder + ':':<24} {after * 1e3:8.2f} ms")
+        print(f"{size:>6} items, speedup: {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,35 @@
+import asyncio
+import signal
+
 from fastapi import FastAPI
-from api import auth, image, video
+from api import admin, auth, content, image, metrics, video
+from utils.database.client import init_client, close_client, init_async_client, close_async_client
 from utils.database.create_admin import create_admin_if_not_exist
+from utils.database.database import Database, DATABASE_NAME
+from utils.database.indexes import ensure_indexes
+from utils.error_handler.error_catalog import refresh_error_catalog, run_error_catalog_refresh
+from utils.environment.settings import get_settings, reload_settings, SettingsException
 from utils.logger.logger import logger
+from utils.metrics.http_metrics import MetricsMiddleware
+from utils.profiling.request_profiler import ProfilingMiddleware, get_profile_store
+from utils.notification.email_sender import get_email_sender, shutdown_email_sender
+from utils.image.renditions import get_rendition_service, shutdown_rendition_service
+from utils.security.password_hasher import get_password_hasher, shutdown_password_hasher
+from utils.storage.blob_gc import run_blob_gc
+from utils.video.thumbnail_jobs import start_thumbnail_workers, stop_thumbnail_workers
+from utils.video.upload_sessions import run_session_sweeper
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI()
+background_tasks = []
 
 routers = [
+    admin.router,
     auth.router,
+    content.router,
     image.router,
+    metrics.router,
     video.router
 ]
 
@@ -18,12 +38,54 @@ for router in routers:  # routers_test
 
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"],
                    allow_credentials=True)
+if get_settings().profiling_enabled:
+    app.add_middleware(ProfilingMiddleware, store=get_profile_store())
+if get_settings().metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+
+def reload_settings_on_signal():
+    try:
+        reload_settings()
+    except SettingsException as e:
+        logger.error(f"Settings are not reloaded: {e}")
 
 
 @app.on_event("startup")
 async def startup_event():
     logger.info("API STARTED, docs at /docs#")
+    get_settings()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload_settings_on_signal)
+    except (NotImplementedError, AttributeError, RuntimeError):
+        # No SIGHUP on Windows, and signal handlers only work from the main thread
+        logger.info("SIGHUP settings reload is not available")
+    init_client()
+    init_async_client()
+    get_password_hasher()
+    get_rendition_service()
+    get_email_sender()
+    ensure_indexes(Database(DATABASE_NAME))
     create_admin_if_not_exist()
+    await refresh_error_catalog()
+    background_tasks.append(asyncio.create_task(run_error_catalog_refresh(get_settings().error_catalog_refresh_seconds)))
+    background_tasks.append(asyncio.create_task(run_session_sweeper(get_settings().upload_session_sweep_seconds)))
+    background_tasks.append(asyncio.create_task(run_blob_gc(get_settings().blob_gc_seconds)))
+    start_thumbnail_workers()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    await stop_thumbnail_workers()
+    shutdown_password_hasher()
+    shutdown_rendition_service()
+    shutdown_email_sender()
+    await close_async_client()
+    close_client()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,30 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from utils.cache.disk_lru_cache import DiskLRUCache
+
+
+class DiskLRUCacheTest(TestCase):
+    def test_least_recently_used_is_evicted(self):
+        with tempfile.TemporaryDirectory() as root:
+            cache = DiskLRUCache(root, max_bytes=25)
+            cache.put("a", b"a" * 10)
+            cache.put("b", b"b" * 10)
+            cache.get("a")
+            cache.put("c", b"c" * 10)
+
+            assert cache.get("b") is None
+            assert cache.get("a") == b"a" * 10
+            assert cache.get("c") == b"c" * 10
+            assert sorted(os.listdir(root)) == ["a", "c"]
+            assert cache.stats()["bytes"] == 20
+
+    def test_index_is_rebuilt_from_disk(self):
+        with tempfile.TemporaryDirectory() as root:
+            DiskLRUCache(root, max_bytes=100).put("a", b"a" * 10)
+
+            cache = DiskLRUCache(root, max_bytes=100)
+
+            assert cache.get("a") == b"a" * 10
+            assert cache.stats()["bytes"] == 10
@@ -0,0 +1,42 @@
+from unittest import TestCase
+
+from utils.cache.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTest(TestCase):
+    def test_entries_expire(self):
+        clock = FakeClock()
+        cache = TTLCache(max_size=10, ttl=5, clock=clock)
+        cache.put("user", {"username": "user"})
+
+        assert cache.get("user") == {"username": "user"}
+        clock.now = 6
+        assert cache.get("user") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.put("first", 1)
+        cache.put("second", 2)
+        cache.get("first")
+        cache.put("third", 3)
+
+        assert cache.get("second") is None
+        assert cache.get("first") == 1
+        assert cache.get("third") == 3
+
+    def test_invalidate(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.put("user", 1)
+        cache.invalidate("user")
+
+        assert cache.get("user") is None
@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from bson import ObjectId
+
+from utils.database.client import init_client, close_client
+from utils.database.database import Database
+
+
+class ClaimTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        init_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        close_client()
+
+    def test_claim_object(self):
+        table_name = "test"
+        collection_name = "jobs"
+        marker = str(ObjectId())
+
+        # Create a Database instance and insert one queued job
+        database = Database(table_name)
+        obj_id = database.insert_object(collection_name, {"status": "queued", "attempts": 0, "test": marker})
+
+        claimed = database.claim_object(collection_name, {"status": "queued", "test": marker},
+                                        {"status": "running"}, increment={"attempts": 1})
+        assert claimed["_id"] == obj_id
+        assert claimed["status"] == "running"
+        assert claimed["attempts"] == 1
+
+        # Once claimed the job no longer matches the filter
+        assert database.claim_object(collection_name, {"status": "queued", "test": marker},
+                                     {"status": "running"}) is None
+        assert database.count_objects(collection_name, {"status": "running", "test": marker}) == 1
@@ -1,9 +1,21 @@
+from datetime import datetime
 from unittest import TestCase
 
+from bson import ObjectId
+
+from utils.database.client import init_client, close_client
 from utils.database.database import Database
 
 
 class DeleteTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        init_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        close_client()
+
     def test_delete_object(self):
         table_name = "test"
         collection_name = "users"
@@ -19,3 +31,36 @@ class DeleteTest(TestCase):
         obj = database.get_object(collection_name,{"_id":obj_id})
         assert len(obj) != 0
         assert obj[0]["is_deleted"]
+
+    def test_delete_many_objects(self):
+        table_name = "test"
+        collection_name = "users"
+        marker = str(ObjectId())
+        deleted_at = datetime(2024, 1, 1)
+
+        database = Database(table_name)
+        obj_ids = [database.insert_object(collection_name, {"name": "Gulsah", "test": marker}) for _ in range(3)]
+
+        deleted_count = database.delete_object(collection_name, {"_id": {"$in": obj_ids[:2]}}, deleted_at=deleted_at)
+        assert deleted_count == 2
+
+        deleted = database.get_object(collection_name, {"test": marker}, show_deleted=True)
+        assert sorted(obj["_id"] for obj in deleted) == sorted(obj_ids[:2])
+        assert all(obj["deleted_at"] == deleted_at for obj in deleted)
+        assert len(database.get_object(collection_name, {"test": marker})) == 1
+
+    def test_delete_object_marks_deleted_documents(self):
+        table_name = "test"
+        collection_name = "users"
+        marker = str(ObjectId())
+
+        database = Database(table_name)
+        obj_ids = [database.insert_object(collection_name, {"name": "Gulsah", "test": marker}) for _ in range(3)]
+        database.delete_object(collection_name, {"_id": obj_ids[0]})
+
+        deleted_count = database.delete_object(collection_name, {"_id": {"$in": obj_ids[:2]}},
+                                               new_data={"deleted_by_request": marker})
+        assert deleted_count == 1
+
+        marked = database.get_object(collection_name, {"deleted_by_request": marker}, show_deleted=True)
+        assert [obj["_id"] for obj in marked] == [obj_ids[1]]
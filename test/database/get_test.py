@@ -1,9 +1,20 @@
 from unittest import TestCase
 
+from bson import ObjectId
+
+from utils.database.client import init_client, close_client
 from utils.database.database import Database
 
 
 class GetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        init_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        close_client()
+
     def test_get_object(self):
         table_name = "test"
         collection_name = "users"
@@ -20,4 +31,54 @@ class GetTest(TestCase):
         # Get the count of documents after the insert
         result = database.get_object(collection_name,{"_id":obj_id})
         assert len(result) == 1
-        assert result[0]["_id"] == obj_id
\ No newline at end of file
+        assert result[0]["_id"] == obj_id
+
+    def test_get_single_object(self):
+        table_name = "test"
+        collection_name = "users"
+        test_obj = {
+            "name": "Gulsah",
+            "role": "Owner",
+            "test": str(ObjectId())
+        }
+
+        database = Database(table_name)
+        obj_id = database.insert_object(collection_name, test_obj)
+
+        result = database.get_single_object(collection_name, {"_id": obj_id}, projection={"name": 1})
+        assert result["_id"] == obj_id
+        assert result["name"] == "Gulsah"
+        assert "role" not in result
+
+        # Two matches are ambiguous for get_single_object
+        database.insert_object(collection_name, {"name": "Gulsah", "test": test_obj["test"]})
+        assert database.get_single_object(collection_name, {"test": test_obj["test"]}) is None
+
+    def test_exists(self):
+        table_name = "test"
+        collection_name = "users"
+        marker = str(ObjectId())
+
+        database = Database(table_name)
+        assert not database.exists(collection_name, {"test": marker})
+        database.insert_object(collection_name, {"name": "Gulsah", "test": marker})
+        assert database.exists(collection_name, {"test": marker})
+
+    def test_iterate_objects(self):
+        table_name = "test"
+        collection_name = "users"
+        marker = str(ObjectId())
+
+        database = Database(table_name)
+        database.insert_objects(collection_name, [{"index": index, "test": marker} for index in range(25)])
+        deleted_id = database.insert_object(collection_name, {"index": 25, "test": marker})
+        database.delete_object(collection_name, {"_id": deleted_id})
+
+        documents = database.iterate_objects(collection_name, {"test": marker}, projection={"index": 1},
+                                             sort=[("index", -1)], batch_size=10)
+        assert [obj["index"] for obj in documents] == list(range(24, -1, -1))
+
+        # Stopping early closes the cursor
+        documents = database.iterate_objects(collection_name, {"test": marker}, batch_size=10)
+        assert next(documents)["test"] == marker
+        documents.close()
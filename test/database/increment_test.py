@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+from bson import ObjectId
+
+from utils.database.client import init_client, close_client
+from utils.database.database import Database
+
+
+class IncrementTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        init_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        close_client()
+
+    def test_increment_object(self):
+        table_name = "test"
+        collection_name = "blobs"
+        digest = str(ObjectId())
+
+        # Create a Database instance, the first increment inserts the counter
+        database = Database(table_name)
+        counter = database.increment_object(collection_name, {"_id": digest}, {"refcount": 1},
+                                            {"is_deleted": False}, upsert=True)
+        assert counter["refcount"] == 1
+
+        counter = database.increment_object(collection_name, {"_id": digest}, {"refcount": 1})
+        assert counter["refcount"] == 2
+
+        # A soft deleted counter still matches and comes back when is_deleted is set
+        database.delete_object(collection_name, {"_id": digest})
+        counter = database.increment_object(collection_name, {"_id": digest}, {"refcount": -1},
+                                            {"is_deleted": False})
+        assert counter["refcount"] == 1
+        assert database.exists(collection_name, {"_id": digest})
@@ -1,10 +1,20 @@
 from unittest import TestCase
-from pymongo import MongoClient
 
+from bson import ObjectId
+
+from utils.database.client import init_client, close_client, get_client
 from utils.database.database import Database
 
 
 class InsertTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        init_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        close_client()
+
     def test_insert_object(self):
         table_name = "test"
         collection_name = "users"
@@ -14,8 +24,8 @@ class InsertTest(TestCase):
             "test": "insert_request"
         }
 
-        # Establish a connection to the MongoDB server
-        mongo_client = MongoClient("mongodb://localhost:27017")
+        # Use the same shared client the Database handles use
+        mongo_client = get_client()
 
         # Get the initial count of documents in the collection
         initial_count = mongo_client[table_name][collection_name].count_documents({})
@@ -27,7 +37,24 @@ class InsertTest(TestCase):
         # Get the count of documents after the insert
         after_insert_count = mongo_client[table_name][collection_name].count_documents({})
 
-        # Close the MongoClient
-        mongo_client.close()
-
         assert initial_count + 1 == after_insert_count
+
+    def test_insert_objects(self):
+        table_name = "test"
+        collection_name = "users"
+        duplicate_id = ObjectId()
+        test_objs = [
+            {"_id": duplicate_id, "name": "Gulsah", "test": "insert_many_request"},
+            {"_id": duplicate_id, "name": "Gulsah", "test": "insert_many_request"},
+            {"name": "Gulsah", "test": "insert_many_request"},
+        ]
+
+        # Unordered inserts keep going after the duplicate key error
+        database = Database(table_name)
+        obj_ids, errors = database.insert_objects(collection_name, test_objs, ordered=False)
+
+        assert obj_ids[0] == duplicate_id
+        assert obj_ids[1] is None
+        assert obj_ids[2] is not None
+        assert list(errors.keys()) == [1]
+        assert database.get_single_object(collection_name, {"_id": obj_ids[2]}) is not None
@@ -0,0 +1,39 @@
+from unittest import TestCase
+
+from bson import ObjectId
+
+from utils.database.client import init_client, close_client
+from utils.database.database import Database
+
+
+class PaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        init_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        close_client()
+
+    def test_get_page(self):
+        table_name = "test"
+        collection_name = "users"
+        marker = str(ObjectId())
+
+        # Create a Database instance and insert five test objects
+        database = Database(table_name)
+        obj_ids = [database.insert_object(collection_name, {"name": "Gulsah", "test": marker, "order": i})
+                   for i in range(5)]
+
+        first_page, next_cursor = database.get_page(collection_name, {"test": marker}, limit=2)
+        assert [obj["_id"] for obj in first_page] == [obj_ids[4], obj_ids[3]]
+        assert next_cursor is not None
+
+        second_page, next_cursor = database.get_page(collection_name, {"test": marker},
+                                                     projection={"order": 1}, limit=2, cursor=next_cursor)
+        assert [obj["_id"] for obj in second_page] == [obj_ids[2], obj_ids[1]]
+        assert "name" not in second_page[0]
+
+        last_page, next_cursor = database.get_page(collection_name, {"test": marker}, limit=2, cursor=next_cursor)
+        assert [obj["_id"] for obj in last_page] == [obj_ids[0]]
+        assert next_cursor is None
@@ -1,9 +1,18 @@
 from unittest import TestCase
 
+from utils.database.client import init_client, close_client
 from utils.database.database import Database
 
 
 class UpdateTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        init_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        close_client()
+
     def test_update_object(self):
         table_name = "test"
         collection_name = "users"
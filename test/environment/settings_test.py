@@ -0,0 +1,41 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from utils.environment.settings import load_settings, SettingsException
+
+
+class SettingsTest(TestCase):
+    def test_values_are_typed(self):
+        with patch.dict("os.environ", {"OS": "prod", "MONGO_MAX_POOL_SIZE": "25", "DATABASE_BACKEND": "thread"}):
+            settings = load_settings()
+
+        assert settings.mongo_max_pool_size == 25
+        assert settings.database_backend == "thread"
+        assert settings.mongo_min_pool_size == 0
+
+    def test_list_values(self):
+        with patch.dict("os.environ", {"OS": "prod", "THUMBNAIL_SIZES": "64, 320"}):
+            settings = load_settings()
+
+        assert settings.thumbnail_sizes == (64, 320)
+
+    def test_invalid_value_is_rejected(self):
+        with patch.dict("os.environ", {"OS": "prod", "MONGO_MAX_POOL_SIZE": "many"}):
+            with self.assertRaises(SettingsException):
+                load_settings()
+
+    def test_out_of_range_value_is_rejected(self):
+        for key, value in (("BCRYPT_ROUNDS", "3"), ("BCRYPT_ROUNDS", "32"), ("BLOB_GC_SECONDS", "0"),
+                           ("ERROR_CATALOG_REFRESH_SECONDS", "0")):
+            with patch.dict("os.environ", {"OS": "prod", key: value}):
+                with self.assertRaises(SettingsException):
+                    load_settings()
+
+    def test_settings_are_immutable(self):
+        with patch.dict("os.environ", {"OS": "prod"}):
+            settings = load_settings()
+
+        with self.assertRaises(Exception):
+            settings.secret_key = "changed"
+        with self.assertRaises(TypeError):
+            settings.raw["SECRET_KEY"] = "changed"
@@ -0,0 +1,38 @@
+import asyncio
+from unittest import TestCase
+
+from utils.error_handler.error_catalog import ErrorCatalog
+from utils.error_handler.error_codes import ErrorCode
+
+
+class StaticDatabase:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def get_object(self, collection_name, filter=None, projection=None):
+        return [dict(document) for document in self.documents]
+
+
+class ErrorCatalogTest(TestCase):
+    def test_every_code_has_a_default(self):
+        catalog = ErrorCatalog()
+
+        for code in ErrorCode:
+            assert catalog.get(code) is not None, code
+
+    def test_database_messages_override_defaults(self):
+        catalog = ErrorCatalog()
+        database = StaticDatabase([
+            {"error_code": ErrorCode.INVALID_OTP_OR_EXPIRED.value, "error_message": "Wrong code",
+             "go_back": False, "go_home": True, "logout": False},
+            {"error_code": ErrorCode.USER_NOT_FOUND.value},
+        ])
+
+        asyncio.run(catalog.refresh(database))
+
+        assert catalog.get(ErrorCode.INVALID_OTP_OR_EXPIRED).error_message == "Wrong code"
+        # The incomplete document is skipped and the default stays
+        assert catalog.get(ErrorCode.USER_NOT_FOUND).error_message == "User could not be found"
+
+        asyncio.run(catalog.refresh(StaticDatabase([])))
+        assert catalog.get(ErrorCode.INVALID_OTP_OR_EXPIRED).error_message == "The code is invalid or has expired"
@@ -0,0 +1,21 @@
+from unittest import TestCase
+
+from utils.http.conditional import etag_matches, not_modified_since
+
+# Sun, 18 Oct 2026 09:00:00 GMT
+LAST_MODIFIED = 1792314000.5
+
+
+class ConditionalTest(TestCase):
+    def test_etag_matches(self):
+        assert etag_matches('"a", W/"b"', '"b"')
+        assert etag_matches("*", '"a"')
+        assert not etag_matches('"a"', '"b"')
+        assert not etag_matches(None, '"a"')
+
+    def test_not_modified_since(self):
+        assert not_modified_since("Sun, 18 Oct 2026 09:00:00 GMT", LAST_MODIFIED)
+        assert not_modified_since("Mon, 19 Oct 2026 09:00:00 GMT", LAST_MODIFIED)
+        assert not not_modified_since("Sun, 18 Oct 2026 08:59:59 GMT", LAST_MODIFIED)
+        assert not not_modified_since("not a date", LAST_MODIFIED)
+        assert not not_modified_since(None, LAST_MODIFIED)
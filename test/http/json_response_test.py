@@ -0,0 +1,59 @@
+import asyncio
+import json
+from datetime import datetime
+from unittest import TestCase
+
+from bson import ObjectId
+
+from utils.http import json_response
+
+
+class JsonResponseTest(TestCase):
+    def test_mongo_values_are_encoded(self):
+        object_id = ObjectId()
+        content = {"id": object_id, "created_at": datetime(2024, 1, 2, 3, 4, 5, 6), "name": "ü"}
+
+        assert json.loads(json_response.dumps(content)) == {"id": str(object_id),
+                                                            "created_at": "2024-01-02T03:04:05.000006",
+                                                            "name": "ü"}
+
+    def test_standard_library_fallback_matches(self):
+        content = {"id": ObjectId(), "created_at": datetime(2024, 1, 2), "items": [1, None, "a"]}
+        encoded = json_response.dumps(content)
+        orjson, json_response.orjson = json_response.orjson, None
+        try:
+            assert json_response.dumps(content) == encoded
+        finally:
+            json_response.orjson = orjson
+
+    def test_unknown_type_raises(self):
+        with self.assertRaises(TypeError):
+            json_response.dumps({"value": object()})
+
+
+async def documents(count: int):
+    for index in range(count):
+        yield {"index": index}
+
+
+def collect(stream_format: json_response.StreamFormat, count: int):
+    async def run():
+        return [chunk async for chunk in json_response.encode_stream(documents(count), dict, stream_format)]
+    return asyncio.run(run())
+
+
+class EncodeStreamTest(TestCase):
+    def test_first_document_is_sent_alone(self):
+        chunks = collect(json_response.StreamFormat.NDJSON, 10000)
+
+        assert chunks[0] == b'{"index":0}\n'
+        assert len(chunks) > 2
+        assert all(len(chunk) < json_response.STREAM_CHUNK_BYTES + 100 for chunk in chunks)
+        lines = b"".join(chunks).splitlines()
+        assert [json.loads(line)["index"] for line in lines] == list(range(10000))
+
+    def test_json_array(self):
+        assert json.loads(b"".join(collect(json_response.StreamFormat.JSON, 10000))) == \
+               [{"index": index} for index in range(10000)]
+        assert b"".join(collect(json_response.StreamFormat.JSON, 1)) == b'[{"index":0}]'
+        assert b"".join(collect(json_response.StreamFormat.JSON, 0)) == b"[]"
@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+from utils.metrics.registry import Registry, Counter, Gauge, Histogram, CallbackGauge
+
+
+class RegistryTest(TestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1), registry=registry)
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value, "/image")
+
+        lines = registry.render().splitlines()
+
+        assert lines[:2] == ["# HELP latency_seconds Latency", "# TYPE latency_seconds histogram"]
+        assert 'latency_seconds_bucket{route="/image",le="0.1"} 2.0' in lines
+        assert 'latency_seconds_bucket{route="/image",le="1.0"} 3.0' in lines
+        assert 'latency_seconds_bucket{route="/image",le="+Inf"} 4.0' in lines
+        assert 'latency_seconds_count{route="/image"} 4.0' in lines
+        assert 'latency_seconds_sum{route="/image"} 3.65' in lines
+
+    def test_counters_gauges_and_callbacks(self):
+        registry = Registry()
+        counter = Counter("requests_total", "Requests", ("path",), registry=registry)
+        gauge = Gauge("in_flight", "In flight", registry=registry)
+        CallbackGauge("cache_entries", "Entries", ("cache",), lambda: {("users",): 3}, registry=registry)
+        counter.inc('a"b\\c')
+        counter.inc('a"b\\c', amount=2)
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        lines = registry.render().splitlines()
+
+        assert 'requests_total{path="a\\"b\\\\c"} 3.0' in lines
+        assert "in_flight 1.0" in lines
+        assert 'cache_entries{cache="users"} 3.0' in lines
+
+    def test_failing_callback_is_skipped(self):
+        registry = Registry()
+        CallbackGauge("broken", "Broken", (), lambda: 1 / 0, registry=registry)
+        Counter("working_total", "Working", registry=registry).inc()
+
+        text = registry.render()
+
+        assert "broken" not in text
+        assert "working_total 1.0" in text
+
+    def test_duplicate_name_is_rejected(self):
+        registry = Registry()
+        Counter("once_total", "Once", registry=registry)
+        with self.assertRaises(ValueError):
+            Counter("once_total", "Once", registry=registry)
@@ -0,0 +1,143 @@
+import socketserver
+import threading
+import time
+from unittest import TestCase
+
+from utils.notification.email_sender import EmailSender, OutboundEmail
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 localhost")
+        recipient = None
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+            command = line.split(" ", 1)[0].upper()
+            if command in ("EHLO", "HELO", "RSET", "NOOP"):
+                self.reply("250 localhost")
+            elif command == "MAIL":
+                if server.temporary_failures > 0:
+                    server.temporary_failures -= 1
+                    self.reply("451 try again later")
+                else:
+                    self.reply("250 ok")
+            elif command == "RCPT":
+                recipient = line.split(":", 1)[1].strip("<> ")
+                self.reply("550 no such user" if recipient in server.unknown else "250 ok")
+            elif command == "DATA":
+                self.reply("354 go ahead")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                server.delivered.append(recipient)
+                self.reply("250 queued")
+                if server.hang_up:
+                    server.hang_up = False
+                    return
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("502 not implemented")
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeSMTPHandler)
+        self.connections = 0
+        self.temporary_failures = 0
+        self.unknown = set()
+        self.hang_up = False
+        self.delivered = []
+
+
+class EmailSenderTest(TestCase):
+    def setUp(self):
+        self.server = FakeSMTPServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.sender = EmailSender("127.0.0.1", self.server.server_address[1], use_ssl=False,
+                                  username=None, password=None, timeout_seconds=2, batch_size=5,
+                                  max_attempts=3, retry_seconds=0.05, idle_seconds=5)
+        self.sender.start()
+
+    def tearDown(self):
+        self.sender.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            assert time.monotonic() < deadline, self.sender.stats()
+            time.sleep(0.01)
+
+    def test_emails_share_one_connection(self):
+        for index in range(12):
+            self.sender.enqueue(OutboundEmail("noreply@example.com", f"user{index}@example.com", "Subject: hi\r\n\r\nhi"))
+
+        self.wait_for(lambda: self.sender.sent == 12)
+
+        assert len(self.server.delivered) == 12
+        assert self.server.connections == 1
+
+    def test_dropped_connection_is_closed_and_replaced(self):
+        self.server.hang_up = True
+        self.sender.enqueue(OutboundEmail("noreply@example.com", "first@example.com", "Subject: hi\r\n\r\nhi"))
+        self.wait_for(lambda: self.sender.sent == 1)
+        dropped = self.sender._connection
+
+        self.sender.enqueue(OutboundEmail("noreply@example.com", "second@example.com", "Subject: hi\r\n\r\nhi"))
+
+        self.wait_for(lambda: self.sender.sent == 2)
+        assert dropped.sock is None
+        assert self.sender.retried == 0
+        assert self.server.connections == 2
+        assert self.server.delivered == ["first@example.com", "second@example.com"]
+
+    def test_temporary_failure_is_retried(self):
+        self.server.temporary_failures = 2
+
+        self.sender.enqueue(OutboundEmail("noreply@example.com", "user@example.com", "Subject: hi\r\n\r\nhi"))
+
+        self.wait_for(lambda: self.sender.sent == 1)
+        assert self.sender.retried == 2
+        assert self.server.delivered == ["user@example.com"]
+
+    def test_refused_recipient_is_not_retried(self):
+        self.server.unknown.add("missing@example.com")
+
+        self.sender.enqueue(OutboundEmail("noreply@example.com", "missing@example.com", "Subject: hi\r\n\r\nhi"))
+        self.sender.enqueue(OutboundEmail("noreply@example.com", "user@example.com", "Subject: hi\r\n\r\nhi"))
+
+        self.wait_for(lambda: self.sender.sent == 1 and self.sender.failed == 1)
+        assert self.sender.retried == 0
+        assert self.server.delivered == ["user@example.com"]
+
+    def test_unexpected_error_keeps_sender_running(self):
+        # smtplib encodes str messages as ascii, anything else raises UnicodeEncodeError
+        self.sender.enqueue(OutboundEmail("noreply@example.com", "user@example.com", "Subject: hé\r\n\r\nhé"))
+        self.sender.enqueue(OutboundEmail("noreply@example.com", "user@example.com", "Subject: hi\r\n\r\nhi"))
+
+        self.wait_for(lambda: self.sender.sent == 1 and self.sender.failed == 1)
+        assert self.sender.retried == 0
+        assert self.server.delivered == ["user@example.com"]
+
+    def test_stop_with_full_queue(self):
+        # Not started, nothing drains the queue
+        sender = EmailSender("127.0.0.1", self.server.server_address[1], use_ssl=False,
+                             username=None, password=None, queue_size=1)
+        sender.enqueue(OutboundEmail("noreply@example.com", "user@example.com", "Subject: hi\r\n\r\nhi"))
+
+        started = time.monotonic()
+        sender.stop(timeout=0.1)
+
+        assert time.monotonic() - started < 1
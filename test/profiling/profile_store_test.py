@@ -0,0 +1,83 @@
+import asyncio
+import cProfile
+import tempfile
+from unittest import TestCase
+
+from utils.profiling.request_profiler import ProfileStore, ProfileNotFoundException, ProfilingMiddleware
+
+
+def profile() -> cProfile.Profile:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    sorted(range(1000), reverse=True)
+    profiler.disable()
+    return profiler
+
+
+class ProfileStoreTest(TestCase):
+    def test_newest_profiles_are_kept(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = ProfileStore(root, max_profiles=2)
+            for index in range(3):
+                store.save(f"request-{index}", profile(), {"id": f"request-{index}",
+                                                           "created_at": f"2024-01-01T00:00:0{index}"})
+
+            assert [item["id"] for item in store.list()] == ["request-2", "request-1"]
+            assert "sorted" in store.summary("request-2")
+            with self.assertRaises(ProfileNotFoundException):
+                store.summary("request-0")
+
+    def test_unsafe_ids_are_rejected(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = ProfileStore(root, max_profiles=2)
+            with self.assertRaises(ProfileNotFoundException):
+                store.path("../settings")
+
+    def test_taken_ids_are_not_overwritten(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = ProfileStore(root, max_profiles=5)
+            first = store.reserve("request")
+            store.save(first, profile(), {"id": first, "created_at": "2024-01-01T00:00:00"})
+
+            second = store.reserve("request")
+
+            assert first == "request"
+            assert second.startswith("request-") and second != first
+            assert [item["id"] for item in store.list()] == ["request"]
+
+    def test_requested_ids_are_cleaned(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = ProfileStore(root, max_profiles=5)
+
+            assert store.reserve("../settings") == "settings"
+            assert len(store.reserve("a" * 100 + "/")) <= 64
+            assert len(store.reserve("/..")) == 32
+
+
+class ProfilingMiddlewareTest(TestCase):
+    def test_in_flight_requests_are_recorded(self):
+        async def app(scope, receive, send):
+            await asyncio.sleep(0.02)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def send(message):
+            pass
+
+        def request():
+            return middleware({"type": "http", "method": "GET", "path": "/", "headers": []}, None, send)
+
+        async def run():
+            # The first request is profiled, the other two start while it runs
+            await asyncio.gather(request(), request(), request())
+
+        with tempfile.TemporaryDirectory() as root:
+            store = ProfileStore(root, max_profiles=2)
+            middleware = ProfilingMiddleware(app, store)
+            middleware.should_profile = lambda headers: not middleware.profiling
+            asyncio.run(run())
+
+            info = store.list()[0]
+            assert info["in_flight_at_start"] == 1
+            assert info["max_in_flight"] == 3
+            assert middleware.in_flight == 0
@@ -0,0 +1,48 @@
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+from unittest import TestCase
+
+from utils.storage.blob_store import LocalBlobStore, BlobNotFoundException, atomic_file
+
+
+class LocalBlobStoreTest(TestCase):
+    def test_put_and_read(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = LocalBlobStore(root)
+            data = b"image bytes" * 100000
+
+            stored = store.put(BytesIO(data))
+
+            assert stored.size == len(data)
+            assert stored.sha256 == hashlib.sha256(data).hexdigest()
+            assert b"".join(store.iter_chunks(stored.key)) == data
+
+    def test_delete(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = LocalBlobStore(root)
+            stored = store.put(BytesIO(b"image bytes"))
+
+            store.delete(stored.key)
+            store.delete(stored.key)
+
+            with self.assertRaises(BlobNotFoundException):
+                store.open(stored.key)
+
+
+class AtomicFileTest(TestCase):
+    def test_failed_write_keeps_old_file(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "ab", "blob")
+            with atomic_file(path) as buffer:
+                buffer.write(b"old")
+
+            with self.assertRaises(RuntimeError):
+                with atomic_file(path) as buffer:
+                    buffer.write(b"partial")
+                    raise RuntimeError("write failed")
+
+            with open(path, "rb") as buffer:
+                assert buffer.read() == b"old"
+            assert os.listdir(os.path.dirname(path)) == ["blob"]
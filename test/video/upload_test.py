@@ -0,0 +1,54 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from unittest import TestCase
+
+from utils.video.upload import stream_multipart_to_file, InvalidUploadException, UploadTooLargeException
+
+CONTENT_TYPE = "multipart/form-data; boundary=zz"
+
+
+def body(video: bytes, content_type: str = "video/mp4") -> bytes:
+    return (b"--zz\r\nContent-Disposition: form-data; name=\"title\"\r\n\r\nholiday\r\n"
+            b"--zz\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.mp4\"\r\n"
+            + f"Content-Type: {content_type}\r\n\r\n".encode() + video + b"\r\n--zz--\r\n")
+
+
+async def chunks(data: bytes, size: int = 7):
+    # Small chunks split the boundaries and headers across reads
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def receive(data: bytes, destination: str, max_bytes: int = 0):
+    return asyncio.run(stream_multipart_to_file(chunks(data), CONTENT_TYPE, "file", destination, max_bytes,
+                                                chunk_size=16))
+
+
+class StreamMultipartTest(TestCase):
+    def test_video_part_is_written_and_hashed(self):
+        video = bytes(range(256)) * 20
+        with tempfile.TemporaryDirectory() as root:
+            destination = os.path.join(root, "video.part")
+
+            received = receive(body(video), destination)
+
+            assert received.filename == "a.mp4"
+            assert received.content_type == "video/mp4"
+            assert received.stored.size == len(video)
+            assert received.stored.sha256 == hashlib.sha256(video).hexdigest()
+            with open(destination, "rb") as buffer:
+                assert buffer.read() == video
+
+    def test_rejected_uploads_leave_nothing(self):
+        with tempfile.TemporaryDirectory() as root:
+            destination = os.path.join(root, "video.part")
+            with self.assertRaises(InvalidUploadException):
+                receive(body(b"text", "text/plain"), destination)
+            with self.assertRaises(InvalidUploadException):
+                receive(body(b"video")[:-10], destination)
+            with self.assertRaises(UploadTooLargeException):
+                receive(body(b"v" * 100), destination, max_bytes=50)
+
+            assert os.listdir(root) == []
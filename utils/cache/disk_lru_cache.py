@@ -0,0 +1,102 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class DiskLRUCache:
+    """
+    Thread safe cache of files in one directory, bounded by their total size.
+    Recency is tracked in memory; on start the index is rebuilt from the
+    directory, oldest access time first. A max_bytes of 0 disables the cache.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        files = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.endswith(".part"):
+                os.remove(path)
+                continue
+            stat_result = os.stat(path)
+            files.append((stat_result.st_atime, name, stat_result.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.total_bytes += size
+        self._evict()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the cached bytes, read at once so an eviction running in
+        another thread cannot remove the file while a response is sent.
+        """
+        with self._lock:
+            cached = key in self._entries
+            if cached:
+                self._entries.move_to_end(key)
+        if cached:
+            try:
+                with open(self.path(key), "rb") as buffer:
+                    data = buffer.read()
+                with self._lock:
+                    self.hits += 1
+                return data
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, data: bytes):
+        if self.max_bytes <= 0:
+            return
+        path = self.path(key)
+        fd, temp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        with os.fdopen(fd, "wb") as buffer:
+            buffer.write(data)
+        os.replace(temp_path, path)
+        with self._lock:
+            self.total_bytes += len(data) - self._entries.get(key, 0)
+            self._entries[key] = len(data)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        # The newest entry is kept even when it alone is over the limit, so an oversized file still caches
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
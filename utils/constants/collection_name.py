@@ -5,3 +5,7 @@ class CollectionName(Enum):
     USER = "User"
     PASSWORD_RESET_REQUESTS = "PasswordResetRequests"
     IMAGES = "Images"
+    UPLOAD_SESSIONS = "UploadSessions"
+    THUMBNAIL_JOBS = "ThumbnailJobs"
+    VIDEO_BLOBS = "VideoBlobs"
+    ERROR_MESSAGES = "ErrorMessages"
@@ -9,4 +9,54 @@ class EnvironmentKeys(Enum):
     SECRET_KEY = "SECRET_KEY"
     EMAIL_PASSWORD = "EMAIL_PASSWORD"
     EMAIL = "EMAIL"
-    OTP_SECRET = "OTP_SECRET"
\ No newline at end of file
+    OTP_SECRET = "OTP_SECRET"
+    MONGO_MAX_POOL_SIZE = "MONGO_MAX_POOL_SIZE"
+    MONGO_MIN_POOL_SIZE = "MONGO_MIN_POOL_SIZE"
+    MONGO_MAX_IDLE_TIME_MS = "MONGO_MAX_IDLE_TIME_MS"
+    MONGO_CONNECT_TIMEOUT_MS = "MONGO_CONNECT_TIMEOUT_MS"
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = "MONGO_SERVER_SELECTION_TIMEOUT_MS"
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = "MONGO_WAIT_QUEUE_TIMEOUT_MS"
+    DATABASE_BACKEND = "DATABASE_BACKEND"
+    USER_CACHE_SIZE = "USER_CACHE_SIZE"
+    USER_CACHE_TTL_SECONDS = "USER_CACHE_TTL_SECONDS"
+    TOKEN_CACHE_SIZE = "TOKEN_CACHE_SIZE"
+    TOKEN_CACHE_TTL_SECONDS = "TOKEN_CACHE_TTL_SECONDS"
+    BCRYPT_ROUNDS = "BCRYPT_ROUNDS"
+    PASSWORD_HASH_WORKERS = "PASSWORD_HASH_WORKERS"
+    PASSWORD_HASH_PROCESSES = "PASSWORD_HASH_PROCESSES"
+    PASSWORD_HASH_MAX_PENDING = "PASSWORD_HASH_MAX_PENDING"
+    VIDEO_MAX_UPLOAD_BYTES = "VIDEO_MAX_UPLOAD_BYTES"
+    VIDEO_UPLOAD_CHUNK_BYTES = "VIDEO_UPLOAD_CHUNK_BYTES"
+    UPLOAD_SESSION_TTL_SECONDS = "UPLOAD_SESSION_TTL_SECONDS"
+    UPLOAD_SESSION_SWEEP_SECONDS = "UPLOAD_SESSION_SWEEP_SECONDS"
+    THUMBNAIL_WORKERS = "THUMBNAIL_WORKERS"
+    THUMBNAIL_JOB_MAX_ATTEMPTS = "THUMBNAIL_JOB_MAX_ATTEMPTS"
+    THUMBNAIL_JOB_TIMEOUT_SECONDS = "THUMBNAIL_JOB_TIMEOUT_SECONDS"
+    THUMBNAIL_JOB_RETRY_SECONDS = "THUMBNAIL_JOB_RETRY_SECONDS"
+    THUMBNAIL_JOB_POLL_SECONDS = "THUMBNAIL_JOB_POLL_SECONDS"
+    BLOB_GC_SECONDS = "BLOB_GC_SECONDS"
+    IMAGE_BLOB_RETENTION_SECONDS = "IMAGE_BLOB_RETENTION_SECONDS"
+    IMAGE_STORE_BACKEND = "IMAGE_STORE_BACKEND"
+    IMAGE_STORE_DIR = "IMAGE_STORE_DIR"
+    THUMBNAIL_SIZES = "THUMBNAIL_SIZES"
+    THUMBNAIL_FORMAT = "THUMBNAIL_FORMAT"
+    THUMBNAIL_QUALITY = "THUMBNAIL_QUALITY"
+    RENDITION_WORKERS = "RENDITION_WORKERS"
+    RENDITION_CACHE_DIR = "RENDITION_CACHE_DIR"
+    RENDITION_CACHE_MAX_BYTES = "RENDITION_CACHE_MAX_BYTES"
+    SMTP_HOST = "SMTP_HOST"
+    SMTP_PORT = "SMTP_PORT"
+    SMTP_SSL = "SMTP_SSL"
+    SMTP_TIMEOUT_SECONDS = "SMTP_TIMEOUT_SECONDS"
+    EMAIL_BATCH_SIZE = "EMAIL_BATCH_SIZE"
+    EMAIL_MAX_ATTEMPTS = "EMAIL_MAX_ATTEMPTS"
+    EMAIL_RETRY_SECONDS = "EMAIL_RETRY_SECONDS"
+    EMAIL_IDLE_SECONDS = "EMAIL_IDLE_SECONDS"
+    EMAIL_QUEUE_SIZE = "EMAIL_QUEUE_SIZE"
+    ERROR_CATALOG_REFRESH_SECONDS = "ERROR_CATALOG_REFRESH_SECONDS"
+    METRICS_ENABLED = "METRICS_ENABLED"
+    METRICS_TOKEN = "METRICS_TOKEN"
+    PROFILING_ENABLED = "PROFILING_ENABLED"
+    PROFILING_SAMPLE_RATE = "PROFILING_SAMPLE_RATE"
+    PROFILING_DIR = "PROFILING_DIR"
+    PROFILING_MAX_PROFILES = "PROFILING_MAX_PROFILES"
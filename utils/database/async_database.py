@@ -0,0 +1,289 @@
+from datetime import datetime
+from typing import Dict, Any, Union, Mapping, Sequence, List, Tuple, Optional, AsyncIterator
+
+from bson.objectid import ObjectId
+from pymongo import AsyncMongoClient, ReturnDocument
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import BulkWriteError
+from starlette.concurrency import run_in_threadpool
+
+from utils.database.client import get_async_client, database_backend, THREAD_BACKEND
+from utils.database.database import Database, DATABASE_NAME, with_deleted_flag, deleted_fields, \
+    bulk_write_errors, inserted_ids, claim_update, next_batch, STREAM_BATCH_SIZE
+from utils.database.pagination import apply_cursor, split_page, DEFAULT_PAGE_SIZE, PAGE_SORT
+from utils.logger import logger
+from utils.metrics.database_metrics import timed_operation
+
+
+class AsyncMongoDatabase:
+    """
+    Same API as MongoDatabase, implemented on the native asyncio driver so the
+    routers can await queries without holding a threadpool slot.
+    """
+    client: AsyncMongoClient
+
+    def __init__(self, database_name):
+        self.client = get_async_client()
+        self.database_name = database_name
+
+    def get_collection(self, collection_name: str) -> AsyncCollection:
+        return self.client.get_database(self.database_name).get_collection(collection_name)
+
+    @timed_operation
+    async def insert_object(self, collection_name: str, obj: Dict[str, Any]) -> ObjectId:
+        obj["is_deleted"] = False
+        return (await self.get_collection(collection_name).insert_one(obj)).inserted_id
+
+    @timed_operation
+    async def insert_objects(self,
+                             collection_name: str,
+                             objs: List[Dict[str, Any]],
+                             ordered: bool = True) -> Tuple[List[Optional[ObjectId]], Dict[int, str]]:
+        if not objs:
+            return [], {}
+        for obj in objs:
+            obj["is_deleted"] = False
+        try:
+            await self.get_collection(collection_name).insert_many(objs, ordered=ordered)
+            errors = {}
+        except BulkWriteError as e:
+            errors = bulk_write_errors(e, len(objs), ordered)
+        return inserted_ids(objs, errors), errors
+
+    @timed_operation
+    async def get_object(self,
+                         collection_name: str,
+                         filter: Dict[str, Any] = None,
+                         show_deleted=False,
+                         projection: Dict[str, Any] = None,
+                         sort: List[Tuple[str, int]] = None,
+                         limit: int = 0,
+                         cursor: str = None) -> [Any]:
+        filter = apply_cursor(with_deleted_flag(filter, show_deleted), cursor)
+        if cursor is not None and sort is None:
+            sort = PAGE_SORT
+        results = self.get_collection(collection_name).find(filter=filter, projection=projection, limit=limit)
+        if sort is not None:
+            results = results.sort(sort)
+        return [obj async for obj in results]
+
+    async def iterate_objects(self,
+                              collection_name: str,
+                              filter: Dict[str, Any] = None,
+                              show_deleted=False,
+                              projection: Dict[str, Any] = None,
+                              sort: List[Tuple[str, int]] = None,
+                              batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[Any]:
+        filter = with_deleted_flag(filter, show_deleted)
+        results = self.get_collection(collection_name).find(filter=filter, projection=projection,
+                                                            batch_size=batch_size)
+        if sort is not None:
+            results = results.sort(sort)
+        try:
+            async for obj in results:
+                yield obj
+        finally:
+            await results.close()
+
+    async def get_page(self,
+                       collection_name: str,
+                       filter: Dict[str, Any] = None,
+                       projection: Dict[str, Any] = None,
+                       limit: int = DEFAULT_PAGE_SIZE,
+                       cursor: str = None) -> Tuple[List[Any], Optional[str]]:
+        objs = await self.get_object(collection_name, filter, projection=projection, sort=PAGE_SORT,
+                                     limit=limit + 1, cursor=cursor)
+        return split_page(objs, limit)
+
+    @timed_operation
+    async def get_single_object(self,
+                                collection_name: str,
+                                filter: Dict[str, Any] = None,
+                                show_deleted=False,
+                                projection: Dict[str, Any] = None) -> [Any]:
+        filter = with_deleted_flag(filter, show_deleted)
+        results = self.get_collection(collection_name).find(filter=filter, projection=projection, limit=2)
+        objs = [obj async for obj in results]
+        if len(objs) != 1:
+            return None
+        return objs[0]
+
+    @timed_operation
+    async def exists(self, collection_name: str, filter: Dict[str, Any] = None, show_deleted=False) -> bool:
+        filter = with_deleted_flag(filter, show_deleted)
+        return await self.get_collection(collection_name).find_one(filter=filter, projection={"_id": 1}) is not None
+
+    @timed_operation
+    async def update_object(self,
+                            collection_name: str,
+                            filter: Dict[str, Any],
+                            new_data: Union[Mapping[str, Any],
+                            Sequence[Mapping[str, Any]]],
+                            upsert: bool = False) -> int:
+        return (await self.get_collection(collection_name)
+                .update_one(filter=filter, update={"$set": new_data}, upsert=upsert)).matched_count
+
+    @timed_operation
+    async def delete_object(self,
+                            collection_name: str,
+                            filter: Dict[str, Any] = None,
+                            deleted_at: datetime = None,
+                            new_data: Mapping[str, Any] = None) -> int:
+        filter = with_deleted_flag(filter)
+        return (await self.get_collection(collection_name)
+                .update_many(filter=filter, update={"$set": deleted_fields(deleted_at, new_data)})).modified_count
+
+    @timed_operation
+    async def claim_object(self,
+                           collection_name: str,
+                           filter: Dict[str, Any],
+                           new_data: Mapping[str, Any],
+                           sort: List[Tuple[str, int]] = None,
+                           increment: Mapping[str, int] = None) -> Optional[Any]:
+        filter = with_deleted_flag(filter)
+        collection = self.get_collection(collection_name)
+        return await collection.find_one_and_update(filter=filter,
+                                                    update=claim_update(new_data, increment),
+                                                    sort=sort,
+                                                    return_document=ReturnDocument.AFTER)
+
+    @timed_operation
+    async def count_objects(self, collection_name: str, filter: Dict[str, Any] = None, show_deleted=False) -> int:
+        filter = with_deleted_flag(filter, show_deleted)
+        return await self.get_collection(collection_name).count_documents(filter)
+
+    @timed_operation
+    async def increment_object(self,
+                               collection_name: str,
+                               filter: Dict[str, Any],
+                               increment: Mapping[str, int],
+                               new_data: Mapping[str, Any] = None,
+                               upsert: bool = False) -> Optional[Any]:
+        collection = self.get_collection(collection_name)
+        return await collection.find_one_and_update(filter=filter,
+                                                    update=claim_update(new_data or {}, increment),
+                                                    upsert=upsert,
+                                                    return_document=ReturnDocument.AFTER)
+
+
+class ThreadedMongoDatabase:
+    """
+    Awaitable wrapper around the synchronous MongoDatabase, every call runs in
+    the threadpool. Selected with DATABASE_BACKEND=thread.
+    """
+
+    def __init__(self, database_name):
+        self.database = Database(database_name)
+
+    async def insert_object(self, collection_name: str, obj: Dict[str, Any]) -> ObjectId:
+        return await run_in_threadpool(self.database.insert_object, collection_name, obj)
+
+    async def insert_objects(self,
+                             collection_name: str,
+                             objs: List[Dict[str, Any]],
+                             ordered: bool = True) -> Tuple[List[Optional[ObjectId]], Dict[int, str]]:
+        return await run_in_threadpool(self.database.insert_objects, collection_name, objs, ordered)
+
+    async def get_object(self,
+                         collection_name: str,
+                         filter: Dict[str, Any] = None,
+                         show_deleted=False,
+                         projection: Dict[str, Any] = None,
+                         sort: List[Tuple[str, int]] = None,
+                         limit: int = 0,
+                         cursor: str = None) -> [Any]:
+        return await run_in_threadpool(self.database.get_object, collection_name, filter, show_deleted,
+                                       projection, sort, limit, cursor)
+
+    async def iterate_objects(self,
+                              collection_name: str,
+                              filter: Dict[str, Any] = None,
+                              show_deleted=False,
+                              projection: Dict[str, Any] = None,
+                              sort: List[Tuple[str, int]] = None,
+                              batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[Any]:
+        # One threadpool hop per batch rather than per document
+        iterator = self.database.iterate_objects(collection_name, filter, show_deleted, projection, sort, batch_size)
+        try:
+            while True:
+                objs = await run_in_threadpool(next_batch, iterator, batch_size)
+                if not objs:
+                    break
+                for obj in objs:
+                    yield obj
+        finally:
+            await run_in_threadpool(iterator.close)
+
+    async def get_page(self,
+                       collection_name: str,
+                       filter: Dict[str, Any] = None,
+                       projection: Dict[str, Any] = None,
+                       limit: int = DEFAULT_PAGE_SIZE,
+                       cursor: str = None) -> Tuple[List[Any], Optional[str]]:
+        return await run_in_threadpool(self.database.get_page, collection_name, filter, projection, limit, cursor)
+
+    async def get_single_object(self,
+                                collection_name: str,
+                                filter: Dict[str, Any] = None,
+                                show_deleted=False,
+                                projection: Dict[str, Any] = None) -> [Any]:
+        return await run_in_threadpool(self.database.get_single_object, collection_name, filter, show_deleted,
+                                       projection)
+
+    async def exists(self, collection_name: str, filter: Dict[str, Any] = None, show_deleted=False) -> bool:
+        return await run_in_threadpool(self.database.exists, collection_name, filter, show_deleted)
+
+    async def update_object(self,
+                            collection_name: str,
+                            filter: Dict[str, Any],
+                            new_data: Union[Mapping[str, Any],
+                            Sequence[Mapping[str, Any]]],
+                            upsert: bool = False) -> int:
+        return await run_in_threadpool(self.database.update_object, collection_name, filter, new_data, upsert)
+
+    async def delete_object(self,
+                            collection_name: str,
+                            filter: Dict[str, Any] = None,
+                            deleted_at: datetime = None,
+                            new_data: Mapping[str, Any] = None) -> int:
+        return await run_in_threadpool(self.database.delete_object, collection_name, filter, deleted_at, new_data)
+
+    async def claim_object(self,
+                           collection_name: str,
+                           filter: Dict[str, Any],
+                           new_data: Mapping[str, Any],
+                           sort: List[Tuple[str, int]] = None,
+                           increment: Mapping[str, int] = None) -> Optional[Any]:
+        return await run_in_threadpool(self.database.claim_object, collection_name, filter, new_data, sort,
+                                       increment)
+
+    async def count_objects(self, collection_name: str, filter: Dict[str, Any] = None, show_deleted=False) -> int:
+        return await run_in_threadpool(self.database.count_objects, collection_name, filter, show_deleted)
+
+    async def increment_object(self,
+                               collection_name: str,
+                               filter: Dict[str, Any],
+                               increment: Mapping[str, int],
+                               new_data: Mapping[str, Any] = None,
+                               upsert: bool = False) -> Optional[Any]:
+        return await run_in_threadpool(self.database.increment_object, collection_name, filter, increment,
+                                       new_data, upsert)
+
+
+AsyncDatabase = Union[AsyncMongoDatabase, ThreadedMongoDatabase]
+
+
+def create_async_database(database_name: str) -> AsyncDatabase:
+    if database_backend() == THREAD_BACKEND:
+        return ThreadedMongoDatabase(database_name)
+    return AsyncMongoDatabase(database_name)
+
+
+async def get_async_db():
+    db = create_async_database(DATABASE_NAME)
+    try:
+        yield db
+        logger.logger.info("Database init is done")
+    except Exception as e:
+        logger.logger.error(e)
+        raise
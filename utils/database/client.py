@@ -0,0 +1,90 @@
+import threading
+from typing import Any, Dict, Optional
+
+from pymongo import AsyncMongoClient, MongoClient
+
+from utils.environment.settings import Settings, get_settings
+from utils.logger.logger import logger
+
+ASYNC_BACKEND = "async"
+THREAD_BACKEND = "thread"
+
+_client: Optional[MongoClient] = None
+_client_lock = threading.Lock()
+_async_client: Optional[AsyncMongoClient] = None
+
+
+def client_options(settings: Settings) -> Dict[str, Any]:
+    """
+    Pool and timeout options shared by every client the process creates.
+    Defaults mirror the pymongo defaults so an empty environment behaves as before.
+    """
+    options = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "maxIdleTimeMS": settings.mongo_max_idle_time_ms,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "waitQueueTimeoutMS": settings.mongo_wait_queue_timeout_ms,
+    }
+    return {key: value for key, value in options.items() if value is not None}
+
+
+def init_client() -> MongoClient:
+    """
+    Creates the process wide client. Called once at application startup,
+    calling it again returns the already opened client.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            settings = get_settings()
+            _client = MongoClient(settings.mongo_uri, **client_options(settings))
+            logger.info("Mongo client initialized")
+        return _client
+
+
+def get_client() -> MongoClient:
+    if _client is None:
+        return init_client()
+    return _client
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+            logger.info("Mongo client closed")
+
+
+def database_backend() -> str:
+    """
+    Backend used by the routers, "async" for the native asyncio driver or
+    "thread" to run the synchronous driver in the threadpool.
+    """
+    return get_settings().database_backend
+
+
+def init_async_client() -> AsyncMongoClient:
+    global _async_client
+    if _async_client is None:
+        settings = get_settings()
+        _async_client = AsyncMongoClient(settings.mongo_uri, **client_options(settings))
+        logger.info("Async mongo client initialized")
+    return _async_client
+
+
+def get_async_client() -> AsyncMongoClient:
+    if _async_client is None:
+        return init_async_client()
+    return _async_client
+
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+        logger.info("Async mongo client closed")
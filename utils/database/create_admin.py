@@ -1,10 +1,8 @@
 import os
 
-from fastapi import Depends
-
 from api.data.auth_data import User
 from utils.constants.collection_name import CollectionName
-from utils.database.database import Database, get_db
+from utils.database.database import Database, DATABASE_NAME
 from utils.security.authenticate import get_password_hash
 from utils.security.scopes import UserScopes
 
@@ -25,7 +23,6 @@ def __create_admin__(db: Database):
 
 
 def create_admin_if_not_exist():
-    db = Database("platform")
-    obj = db.get_single_object(CollectionName.USER.value, {"username": "admin", "email": "admin"})
-    if obj is None:
+    db = Database(DATABASE_NAME)
+    if not db.exists(CollectionName.USER.value, {"username": "admin", "email": "admin"}):
         __create_admin__(db)
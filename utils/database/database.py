@@ -1,69 +1,242 @@
-from typing import Dict, Any, Union, Mapping, Sequence, TypeVar
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Any, Union, Mapping, Sequence, TypeVar, List, Tuple, Optional, Iterator
 
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
 from bson.objectid import ObjectId
 
-from utils.constants.environment_keys import EnvironmentKeys
-from utils.environment.environment_manager import EnvironmentManager
+from utils.database.client import get_client
+from utils.database.pagination import apply_cursor, split_page, DEFAULT_PAGE_SIZE, PAGE_SORT
 from utils.logger import logger
+from utils.metrics.database_metrics import timed_operation
 
 T = TypeVar('T')
 
+DATABASE_NAME = "platform"
+# Documents per getMore while a cursor is streamed
+STREAM_BATCH_SIZE = 500
+
+
+def bulk_write_errors(error: BulkWriteError, count: int, ordered: bool) -> Dict[int, str]:
+    errors = {write_error["index"]: write_error["errmsg"] for write_error in error.details.get("writeErrors", [])}
+    if ordered and errors:
+        # An ordered insert stops at the first failure, the rest is never attempted
+        for index in range(min(errors) + 1, count):
+            errors[index] = "Not inserted because an earlier object failed"
+    return errors
+
+
+def inserted_ids(objs: List[Dict[str, Any]], errors: Dict[int, str]) -> List[Optional[ObjectId]]:
+    # insert_many assigns _id on the given documents before sending them
+    return [None if index in errors else obj["_id"] for index, obj in enumerate(objs)]
+
+
+def deleted_fields(deleted_at: datetime = None, new_data: Mapping[str, Any] = None) -> Dict[str, Any]:
+    fields = {"is_deleted": True}
+    if deleted_at is not None:
+        fields["deleted_at"] = deleted_at
+    if new_data:
+        fields.update(new_data)
+    return fields
+
+
+def claim_update(new_data: Mapping[str, Any], increment: Mapping[str, int] = None) -> Dict[str, Any]:
+    update = {"$set": new_data} if new_data else {}
+    if increment:
+        update["$inc"] = increment
+    return update
+
+
+def next_batch(iterator: Iterator[T], size: int) -> List[T]:
+    return list(islice(iterator, size))
+
+
+def with_deleted_flag(filter: Dict[str, Any] = None, show_deleted=False) -> Dict[str, Any]:
+    if filter is not None:
+        filter["is_deleted"] = show_deleted
+    else:
+        filter = {"is_deleted": show_deleted}
+    return filter
+
 
 class MongoDatabase:
     client: MongoClient
 
     def __init__(self, database_name):
-        ev_manager = EnvironmentManager()
-        connection_string = ev_manager.get_key(EnvironmentKeys.MONGO_URI.value)
-        self.client = MongoClient(
-            connection_string if connection_string is not None else "mongodb://localhost:27017"
-        )
+        # Handles share the process wide client, so creating one per request is cheap
+        self.client = get_client()
         self.database_name = database_name
 
+    def get_collection(self, collection_name: str) -> Collection:
+        return self.client.get_database(self.database_name).get_collection(collection_name)
+
+    @timed_operation
     def insert_object(self, collection_name: str, obj: Dict[str, Any]) -> ObjectId:
         obj["is_deleted"] = False
-        return self.client.get_database(self.database_name).get_collection(collection_name).insert_one(obj).inserted_id
-
-    # TODO get operation should contain sorting
-    def get_object(self, collection_name: str, filter: Dict[str, Any] = None, show_deleted=False) -> [Any]:
-        if filter is not None:
-            filter["is_deleted"] = show_deleted
-        else:
-            filter = {"is_deleted": show_deleted}
-        cursor = self.client.get_database(self.database_name).get_collection(collection_name).find(filter=filter)
-        return [obj for obj in cursor]
-
-    def get_single_object(self, collection_name: str, filter: Dict[str, Any] = None, show_deleted=False) -> [Any]:
-        if filter is not None:
-            filter["is_deleted"] = show_deleted
-        else:
-            filter = {"is_deleted": show_deleted}
-        cursor = self.client.get_database(self.database_name).get_collection(collection_name).find(filter=filter)
-        objs = [obj for obj in cursor]
+        return self.get_collection(collection_name).insert_one(obj).inserted_id
+
+    @timed_operation
+    def insert_objects(self,
+                       collection_name: str,
+                       objs: List[Dict[str, Any]],
+                       ordered: bool = True) -> Tuple[List[Optional[ObjectId]], Dict[int, str]]:
+        """
+        Inserts every object with one insert_many. Returns the ids in input order,
+        None for objects that were not inserted, and the error message per failed index.
+        """
+        if not objs:
+            return [], {}
+        for obj in objs:
+            obj["is_deleted"] = False
+        try:
+            self.get_collection(collection_name).insert_many(objs, ordered=ordered)
+            errors = {}
+        except BulkWriteError as e:
+            errors = bulk_write_errors(e, len(objs), ordered)
+        return inserted_ids(objs, errors), errors
+
+    @timed_operation
+    def get_object(self,
+                   collection_name: str,
+                   filter: Dict[str, Any] = None,
+                   show_deleted=False,
+                   projection: Dict[str, Any] = None,
+                   sort: List[Tuple[str, int]] = None,
+                   limit: int = 0,
+                   cursor: str = None) -> [Any]:
+        """
+        cursor is a continuation token from get_page, it only makes sense with the
+        default keyset order (newest _id first) so that order is used when it is given.
+        """
+        filter = apply_cursor(with_deleted_flag(filter, show_deleted), cursor)
+        if cursor is not None and sort is None:
+            sort = PAGE_SORT
+        results = self.get_collection(collection_name).find(filter=filter, projection=projection, limit=limit)
+        if sort is not None:
+            results = results.sort(sort)
+        return [obj for obj in results]
+
+    def iterate_objects(self,
+                        collection_name: str,
+                        filter: Dict[str, Any] = None,
+                        show_deleted=False,
+                        projection: Dict[str, Any] = None,
+                        sort: List[Tuple[str, int]] = None,
+                        batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Any]:
+        """
+        Yields documents as the cursor fetches them, batch_size per round trip,
+        so a caller walking a large result never holds all of it. Closing the
+        generator early closes the server cursor.
+        """
+        filter = with_deleted_flag(filter, show_deleted)
+        results = self.get_collection(collection_name).find(filter=filter, projection=projection,
+                                                            batch_size=batch_size)
+        if sort is not None:
+            results = results.sort(sort)
+        try:
+            yield from results
+        finally:
+            results.close()
+
+    def get_page(self,
+                 collection_name: str,
+                 filter: Dict[str, Any] = None,
+                 projection: Dict[str, Any] = None,
+                 limit: int = DEFAULT_PAGE_SIZE,
+                 cursor: str = None) -> Tuple[List[Any], Optional[str]]:
+        objs = self.get_object(collection_name, filter, projection=projection, sort=PAGE_SORT,
+                               limit=limit + 1, cursor=cursor)
+        return split_page(objs, limit)
+
+    @timed_operation
+    def get_single_object(self,
+                          collection_name: str,
+                          filter: Dict[str, Any] = None,
+                          show_deleted=False,
+                          projection: Dict[str, Any] = None) -> [Any]:
+        filter = with_deleted_flag(filter, show_deleted)
+        # Two documents are enough to tell a single match from an ambiguous one
+        results = self.get_collection(collection_name).find(filter=filter, projection=projection, limit=2)
+        objs = [obj for obj in results]
         if len(objs) != 1:
             return None
         return objs[0]
 
+    @timed_operation
+    def exists(self, collection_name: str, filter: Dict[str, Any] = None, show_deleted=False) -> bool:
+        filter = with_deleted_flag(filter, show_deleted)
+        return self.get_collection(collection_name).find_one(filter=filter, projection={"_id": 1}) is not None
+
+    @timed_operation
     def update_object(self,
                       collection_name: str,
                       filter: Dict[str, Any],
                       new_data: Union[Mapping[str, Any],
                       Sequence[Mapping[str, Any]]],
                       upsert: bool = False) -> int:
-        return (self.client.get_database(self.database_name)
-                .get_collection(collection_name)
+        return (self.get_collection(collection_name)
                 .update_one(filter=filter, update={"$set": new_data}, upsert=upsert)
                 .matched_count)
 
+    @timed_operation
     def delete_object(self,
                       collection_name: str,
-                      filter: Dict[str, Any] = None) -> int:
-        objects = self.get_object(collection_name, filter)
-        deleted_number = 0
-        for obj in objects:
-            deleted_number += self.update_object(collection_name, {"_id": obj["_id"]}, {"is_deleted": True})
-        return deleted_number
+                      filter: Dict[str, Any] = None,
+                      deleted_at: datetime = None,
+                      new_data: Mapping[str, Any] = None) -> int:
+        """
+        Soft deletes every live document matching the filter in one update_many.
+        new_data is set on the same documents, a marker there lets the caller
+        find exactly the ones this call deleted.
+        """
+        filter = with_deleted_flag(filter)
+        return (self.get_collection(collection_name)
+                .update_many(filter=filter, update={"$set": deleted_fields(deleted_at, new_data)})
+                .modified_count)
+
+    @timed_operation
+    def claim_object(self,
+                     collection_name: str,
+                     filter: Dict[str, Any],
+                     new_data: Mapping[str, Any],
+                     sort: List[Tuple[str, int]] = None,
+                     increment: Mapping[str, int] = None) -> Optional[Any]:
+        """
+        Atomically updates the first live document matching the filter and returns
+        it after the update, None when nothing matched. Two callers racing for the
+        same document never both get it. increment is applied as $inc in the same update.
+        """
+        filter = with_deleted_flag(filter)
+        collection = self.get_collection(collection_name)
+        return collection.find_one_and_update(filter=filter,
+                                              update=claim_update(new_data, increment),
+                                              sort=sort,
+                                              return_document=ReturnDocument.AFTER)
+
+    @timed_operation
+    def count_objects(self, collection_name: str, filter: Dict[str, Any] = None, show_deleted=False) -> int:
+        filter = with_deleted_flag(filter, show_deleted)
+        return self.get_collection(collection_name).count_documents(filter)
+
+    @timed_operation
+    def increment_object(self,
+                         collection_name: str,
+                         filter: Dict[str, Any],
+                         increment: Mapping[str, int],
+                         new_data: Mapping[str, Any] = None,
+                         upsert: bool = False) -> Optional[Any]:
+        """
+        Applies $inc and $set to one document and returns it after the update.
+        Unlike the other methods the filter is used as given, deleted documents
+        match too so a counter can bring one back by setting is_deleted.
+        """
+        collection = self.get_collection(collection_name)
+        return collection.find_one_and_update(filter=filter,
+                                              update=claim_update(new_data or {}, increment),
+                                              upsert=upsert,
+                                              return_document=ReturnDocument.AFTER)
 
 
 class Database(MongoDatabase):
@@ -72,9 +245,10 @@ class Database(MongoDatabase):
 
 
 def get_db():
-    db = Database("platform")
+    db = Database(DATABASE_NAME)
     try:
         yield db
         logger.logger.info("Database init is done")
     except Exception as e:
         logger.logger.error(e)
+        raise
@@ -0,0 +1,140 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from utils.constants.collection_name import CollectionName
+from utils.database.database import Database
+from utils.logger.logger import logger
+
+
+class IndexSpec:
+    collection: CollectionName
+    keys: List[Tuple[str, int]]
+    name: str
+    unique: bool
+    partial_filter: Dict[str, Any]
+    expire_after_seconds: Optional[int]
+
+    def __init__(self,
+                 collection: CollectionName,
+                 keys: List[Tuple[str, int]],
+                 name: str,
+                 unique: bool = False,
+                 partial_filter: Dict[str, Any] = None,
+                 expire_after_seconds: Optional[int] = None):
+        self.collection = collection
+        self.keys = keys
+        self.name = name
+        self.unique = unique
+        self.partial_filter = partial_filter
+        # Makes a TTL index, Mongo removes a document that long after the date in its single key
+        self.expire_after_seconds = expire_after_seconds
+
+    def options(self) -> Dict[str, Any]:
+        options = {"name": self.name, "unique": self.unique}
+        if self.partial_filter is not None:
+            options["partialFilterExpression"] = self.partial_filter
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        return options
+
+
+# Keys follow the filters MongoDatabase builds, every query carries is_deleted
+INDEXES: List[IndexSpec] = [
+    # Only live users have to be unique so a deleted username can be registered again
+    IndexSpec(CollectionName.USER,
+              [("username", ASCENDING)],
+              "username_unique",
+              unique=True,
+              partial_filter={"is_deleted": False}),
+    # Listing filter plus the keyset order used by get_page
+    IndexSpec(CollectionName.IMAGES,
+              [("username", ASCENDING), ("is_deleted", ASCENDING), ("_id", DESCENDING)],
+              "username_is_deleted_id"),
+    # Listing by processing state
+    IndexSpec(CollectionName.IMAGES,
+              [("username", ASCENDING), ("is_deleted", ASCENDING), ("processing_status", ASCENDING),
+               ("_id", DESCENDING)],
+              "username_is_deleted_processing_status_id"),
+    IndexSpec(CollectionName.PASSWORD_RESET_REQUESTS,
+              [("user_id", ASCENDING), ("is_deleted", ASCENDING)],
+              "user_id_is_deleted"),
+    # Lookup for the expired session sweeper
+    IndexSpec(CollectionName.UPLOAD_SESSIONS,
+              [("is_deleted", ASCENDING), ("expires_at", ASCENDING)],
+              "is_deleted_expires_at"),
+    # Finalized and swept sessions are removed a day later, live ones are left to the sweeper and their part file
+    IndexSpec(CollectionName.UPLOAD_SESSIONS,
+              [("deleted_at", ASCENDING)],
+              "deleted_at_ttl",
+              partial_filter={"is_deleted": True},
+              expire_after_seconds=24 * 60 * 60),
+    # The two branches of the job claim, queued jobs that are due and running jobs whose lock ran out
+    IndexSpec(CollectionName.THUMBNAIL_JOBS,
+              [("is_deleted", ASCENDING), ("status", ASCENDING), ("available_at", ASCENDING)],
+              "is_deleted_status_available_at"),
+    IndexSpec(CollectionName.THUMBNAIL_JOBS,
+              [("is_deleted", ASCENDING), ("status", ASCENDING), ("locked_until", ASCENDING)],
+              "is_deleted_status_locked_until"),
+    # Only done and failed jobs carry expires_at
+    IndexSpec(CollectionName.THUMBNAIL_JOBS,
+              [("expires_at", ASCENDING)],
+              "expires_at_ttl",
+              expire_after_seconds=0),
+    # Unreferenced blobs for the garbage collector
+    IndexSpec(CollectionName.VIDEO_BLOBS,
+              [("is_deleted", ASCENDING), ("refcount", ASCENDING)],
+              "is_deleted_refcount"),
+    # Deleted images whose bytes are still stored, for the blob garbage collector
+    IndexSpec(CollectionName.IMAGES,
+              [("deleted_at", ASCENDING)],
+              "deleted_at_stored_image",
+              partial_filter={"is_deleted": True, "image_key": {"$type": "string"}}),
+]
+
+
+def ensure_indexes(db: Database, indexes: List[IndexSpec] = None):
+    """
+    Creating an index that already exists with the same spec is a no-op, so this
+    runs on every startup. A failing index is logged and skipped.
+    """
+    for spec in indexes if indexes is not None else INDEXES:
+        try:
+            db.get_collection(spec.collection.value).create_index(spec.keys, **spec.options())
+        except OperationFailure as e:
+            logger.error(f"Index {spec.name} on {spec.collection.value} cannot be created: {e}")
+
+
+def index_report(db: Database, indexes: List[IndexSpec] = None) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Per collection: declared indexes that are missing, existing indexes the
+    registry does not declare and indexes with no recorded use. Usage comes from
+    $indexStats so it only counts accesses since the server last started.
+    """
+    indexes = indexes if indexes is not None else INDEXES
+    report = {}
+    for collection in CollectionName:
+        declared = [spec.name for spec in indexes if spec.collection == collection]
+        if not declared:
+            continue
+        collection_obj = db.get_collection(collection.value)
+        existing = [name for name in collection_obj.index_information() if name != "_id_"]
+        unused = [stats["name"] for stats in collection_obj.aggregate([{"$indexStats": {}}])
+                  if stats["name"] != "_id_" and stats["accesses"]["ops"] == 0]
+        report[collection.value] = {
+            "missing": [name for name in declared if name not in existing],
+            "undeclared": [name for name in existing if name not in declared],
+            "unused": unused,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    from utils.database.client import init_client, close_client
+    from utils.database.database import DATABASE_NAME
+
+    init_client()
+    for collection_name, collection_report in index_report(Database(DATABASE_NAME)).items():
+        print(collection_name, collection_report)
+    close_client()
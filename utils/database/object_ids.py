@@ -0,0 +1,24 @@
+from typing import List
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from fastapi import HTTPException
+
+
+class InvalidObjectIdException(Exception):
+    pass
+
+
+def to_object_ids(ids: List[str]) -> List[ObjectId]:
+    try:
+        return [ObjectId(id) for id in ids]
+    except (InvalidId, TypeError):
+        raise InvalidObjectIdException("Ids must be 24 character hex strings")
+
+
+def path_object_id(id: str) -> ObjectId:
+    # For ids taken from the path, a malformed one is the client's error rather than a 500
+    try:
+        return to_object_ids([id])[0]
+    except InvalidObjectIdException as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,46 @@
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from pymongo import DESCENDING
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Keyset order, ObjectIds grow with insertion time so this is newest upload first
+PAGE_SORT = [("_id", DESCENDING)]
+
+
+class InvalidCursorException(Exception):
+    pass
+
+
+def encode_cursor(object_id: ObjectId) -> str:
+    return base64.urlsafe_b64encode(object_id.binary).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> ObjectId:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return ObjectId(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, InvalidId, TypeError, ValueError, UnicodeEncodeError):
+        raise InvalidCursorException("Cursor could not be decoded")
+
+
+def apply_cursor(filter: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    if cursor:
+        filter["_id"] = {"$lt": decode_cursor(cursor)}
+    return filter
+
+
+def split_page(objs: List[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """
+    Pages are fetched with limit + 1 documents, the extra one only tells
+    whether another page exists.
+    """
+    if len(objs) > limit:
+        objs = objs[:limit]
+        return objs, encode_cursor(objs[-1]["_id"])
+    return objs, None
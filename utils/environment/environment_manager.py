@@ -1,26 +1,26 @@
-import os
-from typing import Dict
+from typing import Mapping, Optional
 
-from dotenv import dotenv_values
-
-from utils.constants.environment_keys import EnvironmentKeys
+from utils.environment.settings import get_settings
 from utils.logger import logger
 
 
 class EnvironmentManager:
-    environment_values: Dict[str, str] = dict()
+    """
+    Key based view over the settings loaded at startup, constructing one
+    no longer reads or parses anything.
+    """
+    environment_values: Mapping[str, Optional[str]]
 
     def __init__(self):
-        env = os.getenv(EnvironmentKeys.OS.value)
-        if env == "prod":
-            for key in EnvironmentKeys:
-                self.environment_values[key.value] = os.getenv(key.value)
-        else:
-            self.environment_values = dotenv_values("./.env")
+        self.environment_values = get_settings().raw
 
     def get_key(self, key) -> str:
         return self.environment_values[key]
 
+    def get_key_or_default(self, key, default=None) -> str:
+        value = self.environment_values.get(key)
+        return value if value is not None else default
+
 
 def get_environment_manager() -> EnvironmentManager:
     ev_manager = EnvironmentManager()
@@ -29,3 +29,4 @@ def get_environment_manager() -> EnvironmentManager:
         logger.logger.info("Environment manager init is done")
     except Exception as e:
         logger.logger.error(e)
+        raise
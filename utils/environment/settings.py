@@ -0,0 +1,269 @@
+import os
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, List, Mapping, Optional, Tuple
+
+from dotenv import dotenv_values
+
+from utils.constants.environment_keys import EnvironmentKeys
+from utils.logger.logger import logger
+
+ENV_FILE = "./.env"
+
+DEFAULT_MONGO_URI = "mongodb://localhost:27017"
+DATABASE_BACKENDS = ("async", "thread")
+IMAGE_STORE_BACKENDS = ("local", "gridfs")
+THUMBNAIL_FORMATS = ("webp", "jpeg")
+
+
+class SettingsException(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Configuration parsed and validated once. A reload builds a new instance,
+    code holding an old one keeps a consistent view.
+    """
+    raw: Mapping[str, Optional[str]]
+    os: Optional[str]
+    mongo_uri: str
+    mongo_max_pool_size: int
+    mongo_min_pool_size: int
+    mongo_max_idle_time_ms: Optional[int]
+    mongo_connect_timeout_ms: int
+    mongo_server_selection_timeout_ms: int
+    mongo_wait_queue_timeout_ms: Optional[int]
+    database_backend: str
+    access_token_expire_minutes: Optional[int]
+    algorithm: Optional[str]
+    secret_key: Optional[str]
+    email: Optional[str]
+    email_password: Optional[str]
+    otp_secret: Optional[str]
+    user_cache_size: int
+    user_cache_ttl_seconds: float
+    token_cache_size: int
+    token_cache_ttl_seconds: float
+    bcrypt_rounds: int
+    password_hash_workers: int
+    password_hash_processes: bool
+    password_hash_max_pending: int
+    video_max_upload_bytes: int
+    video_upload_chunk_bytes: int
+    upload_session_ttl_seconds: int
+    upload_session_sweep_seconds: int
+    thumbnail_workers: int
+    thumbnail_job_max_attempts: int
+    thumbnail_job_timeout_seconds: float
+    thumbnail_job_retry_seconds: float
+    thumbnail_job_poll_seconds: float
+    blob_gc_seconds: int
+    image_blob_retention_seconds: int
+    image_store_backend: str
+    image_store_dir: str
+    thumbnail_sizes: Tuple[int, ...]
+    thumbnail_format: str
+    thumbnail_quality: int
+    rendition_workers: int
+    rendition_cache_dir: str
+    rendition_cache_max_bytes: int
+    smtp_host: str
+    smtp_port: int
+    smtp_ssl: bool
+    smtp_timeout_seconds: float
+    email_batch_size: int
+    email_max_attempts: int
+    email_retry_seconds: float
+    email_idle_seconds: float
+    email_queue_size: int
+    error_catalog_refresh_seconds: float
+    metrics_enabled: bool
+    metrics_token: Optional[str]
+    profiling_enabled: bool
+    profiling_sample_rate: float
+    profiling_dir: str
+    profiling_max_profiles: int
+
+
+def _read_raw_values() -> Mapping[str, Optional[str]]:
+    if os.getenv(EnvironmentKeys.OS.value) == "prod":
+        values = {key.value: os.getenv(key.value) for key in EnvironmentKeys}
+    else:
+        values = dotenv_values(ENV_FILE)
+    return MappingProxyType(dict(values))
+
+
+def _value(raw: Mapping[str, Optional[str]], key: EnvironmentKeys) -> Optional[str]:
+    value = raw.get(key.value)
+    return value if value != "" else None
+
+
+def _int(raw: Mapping[str, Optional[str]], key: EnvironmentKeys, default: Optional[int],
+         minimum: Optional[int] = None, maximum: Optional[int] = None) -> Optional[int]:
+    value = _value(raw, key)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise SettingsException(f"{key.value} must be an integer, got {value}")
+    if (minimum is not None and number < minimum) or (maximum is not None and number > maximum):
+        bounds = f"between {minimum} and {maximum}" if maximum is not None else f"at least {minimum}"
+        raise SettingsException(f"{key.value} must be {bounds}, got {value}")
+    return number
+
+
+def _float(raw: Mapping[str, Optional[str]], key: EnvironmentKeys, default: float) -> float:
+    value = _value(raw, key)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise SettingsException(f"{key.value} must be a number, got {value}")
+
+
+def _positive_float(raw: Mapping[str, Optional[str]], key: EnvironmentKeys, default: float) -> float:
+    # Intervals of background loops, 0 would make them spin
+    value = _float(raw, key, default)
+    if value <= 0:
+        raise SettingsException(f"{key.value} must be greater than 0, got {value}")
+    return value
+
+
+def _bool(raw: Mapping[str, Optional[str]], key: EnvironmentKeys, default: bool) -> bool:
+    value = _value(raw, key)
+    if value is None:
+        return default
+    if value.lower() in ("1", "true", "yes"):
+        return True
+    if value.lower() in ("0", "false", "no"):
+        return False
+    raise SettingsException(f"{key.value} must be true or false, got {value}")
+
+
+def _int_list(raw: Mapping[str, Optional[str]], key: EnvironmentKeys, default: Tuple[int, ...]) -> Tuple[int, ...]:
+    value = _value(raw, key)
+    if value is None:
+        return default
+    try:
+        return tuple(int(item) for item in value.split(",") if item.strip())
+    except ValueError:
+        raise SettingsException(f"{key.value} must be a comma separated list of integers, got {value}")
+
+
+def _choice(raw: Mapping[str, Optional[str]], key: EnvironmentKeys, choices, default: str) -> str:
+    value = _value(raw, key)
+    if value is None:
+        return default
+    if value not in choices:
+        raise SettingsException(f"{key.value} must be one of {', '.join(choices)}, got {value}")
+    return value
+
+
+def load_settings() -> Settings:
+    raw = _read_raw_values()
+    return Settings(
+        raw=raw,
+        os=_value(raw, EnvironmentKeys.OS),
+        mongo_uri=_value(raw, EnvironmentKeys.MONGO_URI) or DEFAULT_MONGO_URI,
+        mongo_max_pool_size=_int(raw, EnvironmentKeys.MONGO_MAX_POOL_SIZE, 100),
+        mongo_min_pool_size=_int(raw, EnvironmentKeys.MONGO_MIN_POOL_SIZE, 0),
+        mongo_max_idle_time_ms=_int(raw, EnvironmentKeys.MONGO_MAX_IDLE_TIME_MS, None),
+        mongo_connect_timeout_ms=_int(raw, EnvironmentKeys.MONGO_CONNECT_TIMEOUT_MS, 20000),
+        mongo_server_selection_timeout_ms=_int(raw, EnvironmentKeys.MONGO_SERVER_SELECTION_TIMEOUT_MS, 30000),
+        mongo_wait_queue_timeout_ms=_int(raw, EnvironmentKeys.MONGO_WAIT_QUEUE_TIMEOUT_MS, None),
+        database_backend=_choice(raw, EnvironmentKeys.DATABASE_BACKEND, DATABASE_BACKENDS, "async"),
+        access_token_expire_minutes=_int(raw, EnvironmentKeys.ACCESS_TOKEN_EXPIRE_MINUTES, None),
+        algorithm=_value(raw, EnvironmentKeys.ALGORITHM),
+        secret_key=_value(raw, EnvironmentKeys.SECRET_KEY),
+        email=_value(raw, EnvironmentKeys.EMAIL),
+        email_password=_value(raw, EnvironmentKeys.EMAIL_PASSWORD),
+        otp_secret=_value(raw, EnvironmentKeys.OTP_SECRET),
+        user_cache_size=_int(raw, EnvironmentKeys.USER_CACHE_SIZE, 10000),
+        user_cache_ttl_seconds=_float(raw, EnvironmentKeys.USER_CACHE_TTL_SECONDS, 60),
+        token_cache_size=_int(raw, EnvironmentKeys.TOKEN_CACHE_SIZE, 10000),
+        token_cache_ttl_seconds=_float(raw, EnvironmentKeys.TOKEN_CACHE_TTL_SECONDS, 300),
+        bcrypt_rounds=_int(raw, EnvironmentKeys.BCRYPT_ROUNDS, 12, minimum=4, maximum=31),
+        password_hash_workers=_int(raw, EnvironmentKeys.PASSWORD_HASH_WORKERS, 2),
+        password_hash_processes=_bool(raw, EnvironmentKeys.PASSWORD_HASH_PROCESSES, False),
+        password_hash_max_pending=_int(raw, EnvironmentKeys.PASSWORD_HASH_MAX_PENDING, 64),
+        video_max_upload_bytes=_int(raw, EnvironmentKeys.VIDEO_MAX_UPLOAD_BYTES, 2 * 1024 * 1024 * 1024),
+        video_upload_chunk_bytes=_int(raw, EnvironmentKeys.VIDEO_UPLOAD_CHUNK_BYTES, 1024 * 1024),
+        upload_session_ttl_seconds=_int(raw, EnvironmentKeys.UPLOAD_SESSION_TTL_SECONDS, 24 * 60 * 60),
+        upload_session_sweep_seconds=_int(raw, EnvironmentKeys.UPLOAD_SESSION_SWEEP_SECONDS, 10 * 60, minimum=1),
+        thumbnail_workers=_int(raw, EnvironmentKeys.THUMBNAIL_WORKERS, 2),
+        thumbnail_job_max_attempts=_int(raw, EnvironmentKeys.THUMBNAIL_JOB_MAX_ATTEMPTS, 3),
+        thumbnail_job_timeout_seconds=_float(raw, EnvironmentKeys.THUMBNAIL_JOB_TIMEOUT_SECONDS, 60),
+        thumbnail_job_retry_seconds=_float(raw, EnvironmentKeys.THUMBNAIL_JOB_RETRY_SECONDS, 10),
+        thumbnail_job_poll_seconds=_positive_float(raw, EnvironmentKeys.THUMBNAIL_JOB_POLL_SECONDS, 2),
+        blob_gc_seconds=_int(raw, EnvironmentKeys.BLOB_GC_SECONDS, 60 * 60, minimum=1),
+        image_blob_retention_seconds=_int(raw, EnvironmentKeys.IMAGE_BLOB_RETENTION_SECONDS, 7 * 24 * 60 * 60),
+        image_store_backend=_choice(raw, EnvironmentKeys.IMAGE_STORE_BACKEND, IMAGE_STORE_BACKENDS, "local"),
+        image_store_dir=_value(raw, EnvironmentKeys.IMAGE_STORE_DIR) or "uploaded_images",
+        thumbnail_sizes=_int_list(raw, EnvironmentKeys.THUMBNAIL_SIZES, (128, 256, 512)),
+        thumbnail_format=_choice(raw, EnvironmentKeys.THUMBNAIL_FORMAT, THUMBNAIL_FORMATS, "webp"),
+        thumbnail_quality=_int(raw, EnvironmentKeys.THUMBNAIL_QUALITY, 80),
+        rendition_workers=_int(raw, EnvironmentKeys.RENDITION_WORKERS, 2),
+        rendition_cache_dir=_value(raw, EnvironmentKeys.RENDITION_CACHE_DIR) or "rendition_cache",
+        rendition_cache_max_bytes=_int(raw, EnvironmentKeys.RENDITION_CACHE_MAX_BYTES, 256 * 1024 * 1024),
+        smtp_host=_value(raw, EnvironmentKeys.SMTP_HOST) or "smtp.gmail.com",
+        smtp_port=_int(raw, EnvironmentKeys.SMTP_PORT, 465),
+        smtp_ssl=_bool(raw, EnvironmentKeys.SMTP_SSL, True),
+        smtp_timeout_seconds=_float(raw, EnvironmentKeys.SMTP_TIMEOUT_SECONDS, 10),
+        email_batch_size=_int(raw, EnvironmentKeys.EMAIL_BATCH_SIZE, 20),
+        email_max_attempts=_int(raw, EnvironmentKeys.EMAIL_MAX_ATTEMPTS, 5),
+        email_retry_seconds=_float(raw, EnvironmentKeys.EMAIL_RETRY_SECONDS, 2),
+        email_idle_seconds=_float(raw, EnvironmentKeys.EMAIL_IDLE_SECONDS, 60),
+        email_queue_size=_int(raw, EnvironmentKeys.EMAIL_QUEUE_SIZE, 1000),
+        error_catalog_refresh_seconds=_positive_float(raw, EnvironmentKeys.ERROR_CATALOG_REFRESH_SECONDS, 5 * 60),
+        metrics_enabled=_bool(raw, EnvironmentKeys.METRICS_ENABLED, True),
+        metrics_token=_value(raw, EnvironmentKeys.METRICS_TOKEN),
+        profiling_enabled=_bool(raw, EnvironmentKeys.PROFILING_ENABLED, False),
+        profiling_sample_rate=_float(raw, EnvironmentKeys.PROFILING_SAMPLE_RATE, 0),
+        profiling_dir=_value(raw, EnvironmentKeys.PROFILING_DIR) or "profiles",
+        profiling_max_profiles=_int(raw, EnvironmentKeys.PROFILING_MAX_PROFILES, 50),
+    )
+
+
+_settings: Optional[Settings] = None
+_settings_lock = threading.Lock()
+_reload_listeners: List[Callable[[Settings], None]] = []
+
+
+def get_settings() -> Settings:
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _set_settings(load_settings())
+    return _settings
+
+
+def _set_settings(settings: Settings):
+    global _settings
+    _settings = settings
+
+
+def add_reload_listener(listener: Callable[[Settings], None]):
+    _reload_listeners.append(listener)
+
+
+def reload_settings() -> Settings:
+    """
+    Parses the configuration again and swaps it in. Invalid configuration raises
+    SettingsException and the running settings stay untouched. Pool and cache
+    sizes are read when those are created, so they change on restart only.
+    """
+    settings = load_settings()
+    with _settings_lock:
+        _set_settings(settings)
+    for listener in _reload_listeners:
+        try:
+            listener(settings)
+        except Exception as e:
+            logger.error(e)
+    logger.info("Settings reloaded")
+    return settings
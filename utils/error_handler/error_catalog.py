@@ -0,0 +1,87 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+from utils.constants.collection_name import CollectionName
+from utils.database.async_database import AsyncDatabase, create_async_database
+from utils.database.database import DATABASE_NAME
+from utils.error_handler.error_codes import ErrorCode
+from utils.error_handler.error_data import CustomError
+from utils.logger.logger import logger
+
+ERROR_MESSAGE_PROJECTION = {"_id": 0, "error_code": 1, "error_message": 1, "go_back": 1, "go_home": 1, "logout": 1}
+
+# Used until ErrorMessages is loaded and for every code it has no document for
+DEFAULT_ERROR_MESSAGES: Dict[ErrorCode, Dict[str, Any]] = {
+    ErrorCode.OBJECT_NOT_FOUND: {"error_message": "The requested item could not be found",
+                                 "go_back": True, "go_home": False, "logout": False},
+    ErrorCode.NOT_UPDATED: {"error_message": "The item could not be updated, please try again",
+                            "go_back": True, "go_home": False, "logout": False},
+    ErrorCode.NOT_INSERTED: {"error_message": "The item could not be saved, please try again",
+                             "go_back": True, "go_home": False, "logout": False},
+    ErrorCode.NOT_DELETED: {"error_message": "The item could not be deleted, please try again",
+                            "go_back": True, "go_home": False, "logout": False},
+    ErrorCode.INCORRECT_USERNAME_OR_PASSWORD: {"error_message": "Incorrect username or password",
+                                               "go_back": True, "go_home": False, "logout": False},
+    ErrorCode.USER_NOT_FOUND: {"error_message": "User could not be found",
+                               "go_back": False, "go_home": False, "logout": True},
+    ErrorCode.CONTENT_ID_IS_ALREADY_EXISTS: {"error_message": "Content with this id already exists",
+                                             "go_back": True, "go_home": False, "logout": False},
+    ErrorCode.INVALID_OTP_OR_EXPIRED: {"error_message": "The code is invalid or has expired",
+                                       "go_back": True, "go_home": False, "logout": False},
+    ErrorCode.RESET_REQUEST_NOT_FOUND: {"error_message": "No password reset was requested",
+                                        "go_back": False, "go_home": True, "logout": False},
+}
+
+UNKNOWN_ERROR_MESSAGE = CustomError(error_message="Please contact with NexArb team",
+                                    go_back=False, go_home=False, logout=False)
+
+
+class ErrorCatalog:
+    """
+    Error messages keyed by error code, held in memory so an error response
+    needs no database round trip. Documents in ErrorMessages override the
+    built-in defaults; refresh swaps in a new table at once.
+    """
+
+    def __init__(self):
+        self.messages: Dict[int, CustomError] = self._defaults()
+        self.loaded_from_database = 0
+
+    @staticmethod
+    def _defaults() -> Dict[int, CustomError]:
+        return {code.value: CustomError(**message) for code, message in DEFAULT_ERROR_MESSAGES.items()}
+
+    def get(self, error: ErrorCode) -> Optional[CustomError]:
+        return self.messages.get(error.value)
+
+    async def refresh(self, db: AsyncDatabase) -> int:
+        documents = await db.get_object(CollectionName.ERROR_MESSAGES.value, projection=ERROR_MESSAGE_PROJECTION)
+        messages = self._defaults()
+        for document in documents:
+            try:
+                messages[int(document.pop("error_code"))] = CustomError(**document)
+            except Exception as e:
+                logger.error(f"Error message {document} is skipped: {e}")
+        self.messages = messages
+        self.loaded_from_database = len(documents)
+        return len(documents)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self.messages), "from_database": self.loaded_from_database}
+
+
+error_catalog = ErrorCatalog()
+
+
+async def refresh_error_catalog():
+    try:
+        await error_catalog.refresh(create_async_database(DATABASE_NAME))
+    except Exception as e:
+        # The table in memory, at worst the defaults, keeps serving errors
+        logger.error(f"Error messages cannot be loaded: {e}")
+
+
+async def run_error_catalog_refresh(interval_seconds: float):
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await refresh_error_catalog()
@@ -0,0 +1,30 @@
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison as If-None-Match requires, W/"x" and "x" are the same tag.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in tags
+
+
+def not_modified_since(if_modified_since: Optional[str], last_modified: float) -> bool:
+    """
+    If-Modified-Since has one second precision, the modification time is
+    truncated before comparing. An unparsable date is ignored.
+    """
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return int(last_modified) <= since.timestamp()
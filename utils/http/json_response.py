@@ -0,0 +1,86 @@
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Dict
+
+from bson import ObjectId
+from starlette.responses import JSONResponse, StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library encoder gives the same output only slower
+    orjson = None
+
+
+def encode_value(value: Any) -> Any:
+    """
+    The types Mongo documents hold that JSON has no type for, called by the
+    encoder for those values only.
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=encode_value)
+    return json.dumps(content, default=encode_value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# Encoded documents are sent once this many bytes are buffered, the first one is sent right away
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+class StreamFormat(Enum):
+    NDJSON = "ndjson"
+    JSON = "json"
+
+
+STREAM_MEDIA_TYPES = {StreamFormat.NDJSON: "application/x-ndjson", StreamFormat.JSON: "application/json"}
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Encodes plain dicts and lists straight from the documents, without the
+    validation and jsonable_encoder pass FastAPI runs on a returned model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+async def encode_stream(documents: AsyncIterator[Dict[str, Any]], to_item: Callable[[Dict[str, Any]], Any],
+                        stream_format: StreamFormat) -> AsyncIterator[bytes]:
+    """
+    NDJSON is one document per line; JSON is a single array written
+    element by element. Memory holds one chunk, not the whole result.
+    """
+    array = stream_format == StreamFormat.JSON
+    separator = b"," if array else b"\n"
+    buffer = bytearray(b"[" if array else b"")
+    first = True
+    async for document in documents:
+        if array and not first:
+            buffer += separator
+        buffer += dumps(to_item(document))
+        if not array:
+            buffer += separator
+        if first or len(buffer) >= STREAM_CHUNK_BYTES:
+            first = False
+            yield bytes(buffer)
+            buffer.clear()
+    if array:
+        buffer += b"]"
+    if buffer:
+        yield bytes(buffer)
+
+
+def stream_response(documents: AsyncIterator[Dict[str, Any]], to_item: Callable[[Dict[str, Any]], Any],
+                    stream_format: StreamFormat, filename: str) -> StreamingResponse:
+    extension = "ndjson" if stream_format == StreamFormat.NDJSON else "json"
+    return StreamingResponse(encode_stream(documents, to_item, stream_format),
+                             media_type=STREAM_MEDIA_TYPES[stream_format],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'})
@@ -0,0 +1,45 @@
+import hashlib
+from io import BytesIO
+from typing import Any, Dict
+
+from utils.image.image_to_base64 import base64_to_bytes
+from utils.image.image_type import detect_image_content_type
+from utils.storage.blob_store import BlobStore, StoredBlob
+
+# Fields read to serve an image, stored or still inline
+IMAGE_CONTENT_PROJECTION = {"image": 1, "image_key": 1, "image_sha256": 1, "image_content_type": 1, "image_size": 1}
+
+
+def stored_image_fields(stored: StoredBlob, content_type: str) -> Dict[str, Any]:
+    # image is cleared, the document keeps the reference and metadata only
+    return {"image": None,
+            "image_key": stored.key,
+            "image_size": stored.size,
+            "image_sha256": stored.sha256,
+            "image_content_type": content_type}
+
+
+def cleared_image_fields() -> Dict[str, Any]:
+    # Every field stored_image_fields writes, so no size or hash outlives the bytes it described
+    return dict.fromkeys(IMAGE_CONTENT_PROJECTION, None)
+
+
+def store_image_bytes(store: BlobStore, data: bytes) -> Dict[str, Any]:
+    return stored_image_fields(store.put(BytesIO(data)), detect_image_content_type(data))
+
+
+def store_base64_image(store: BlobStore, data: str) -> Dict[str, Any]:
+    return store_image_bytes(store, base64_to_bytes(data))
+
+
+def load_image_bytes(store: BlobStore, obj: Dict[str, Any]) -> bytes:
+    if obj.get("image_key"):
+        with store.open(obj["image_key"]) as source:
+            return source.read()
+    return base64_to_bytes(obj["image"])
+
+
+def image_digest(obj: Dict[str, Any]) -> str:
+    if obj.get("image_sha256"):
+        return obj["image_sha256"]
+    return hashlib.sha256(base64_to_bytes(obj["image"])).hexdigest()
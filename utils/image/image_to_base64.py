@@ -7,4 +7,8 @@ from PIL.Image import Image
 def image_to_base64(image: Image) -> str:
     buffered = BytesIO()
     image.save(buffered, format="PNG")
-    return base64.b64encode(buffered.getvalue()).decode("utf-8")
\ No newline at end of file
+    return base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+
+def base64_to_bytes(data: str) -> bytes:
+    return base64.b64decode(data)
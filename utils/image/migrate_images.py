@@ -0,0 +1,60 @@
+import sys
+from typing import Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING
+
+from utils.constants.collection_name import CollectionName
+from utils.database.database import Database
+from utils.image.image_store import store_base64_image
+from utils.logger.logger import logger
+from utils.storage.blob_store import BlobStore
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def migrate_batch(db: Database, store: BlobStore, show_deleted: bool, after: Optional[ObjectId],
+                  batch_size: int) -> Tuple[Optional[ObjectId], int]:
+    """
+    Moves the inline payload of one batch of documents into the store. Returns
+    the last _id seen, None once there is nothing left, and how many documents
+    were converted. Each document
+    is only updated while it still holds the payload that was copied, an
+    image changed in between keeps its new value and the copy is removed.
+    """
+    filter = {"image": {"$type": "string"}}
+    if after is not None:
+        filter["_id"] = {"$gt": after}
+    objs = db.get_object(CollectionName.IMAGES.value, filter, show_deleted=show_deleted,
+                         projection={"image": 1}, sort=[("_id", ASCENDING)], limit=batch_size)
+    converted = 0
+    for obj in objs:
+        fields = store_base64_image(store, obj["image"])
+        if db.update_object(CollectionName.IMAGES.value, {"_id": obj["_id"], "image": obj["image"]}, fields):
+            converted += 1
+        else:
+            store.delete(fields["image_key"])
+    return (objs[-1]["_id"] if objs else None), converted
+
+
+def migrate_images(db: Database, store: BlobStore, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    migrated = 0
+    # Deleted documents carry payloads too, is_deleted is part of every filter so both are walked
+    for show_deleted in (False, True):
+        after, converted = migrate_batch(db, store, show_deleted, None, batch_size)
+        while after is not None:
+            migrated += converted
+            logger.info(f"Moved {migrated} images to the blob store, last id {after}")
+            after, converted = migrate_batch(db, store, show_deleted, after, batch_size)
+    return migrated
+
+
+if __name__ == "__main__":
+    from utils.database.client import init_client, close_client
+    from utils.database.database import DATABASE_NAME
+    from utils.storage.blob_store import get_image_store
+
+    init_client()
+    migrate_images(Database(DATABASE_NAME), get_image_store(),
+                   int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BATCH_SIZE)
+    close_client()
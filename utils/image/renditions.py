@@ -0,0 +1,115 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PIL import Image
+from starlette.concurrency import run_in_threadpool
+
+from utils.cache.disk_lru_cache import DiskLRUCache
+from utils.environment.settings import get_settings
+from utils.logger.logger import logger
+
+# Settings name to PIL format and content type
+RENDITION_FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+
+
+def render_rendition(source: bytes, size: int, image_format: str, quality: int) -> bytes:
+    """
+    Scales the image to fit a size x size box, keeping its aspect ratio and
+    never enlarging it.
+    """
+    with Image.open(BytesIO(source)) as image:
+        image.thumbnail((size, size))
+        if image_format == "jpeg" and image.mode != "RGB":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        buffer = BytesIO()
+        image.save(buffer, format=RENDITION_FORMATS[image_format][0], quality=quality)
+        return buffer.getvalue()
+
+
+class RenditionService:
+    """
+    Resized thumbnails, rendered on a bounded executor and kept in a disk
+    cache keyed by the source digest. Concurrent requests for a rendition
+    that is not cached yet wait on the same render.
+    """
+
+    def __init__(self, cache: DiskLRUCache, sizes: Tuple[int, ...], image_format: str, quality: int, workers: int):
+        self.cache = cache
+        self.sizes = sizes
+        self.image_format = image_format
+        self.quality = quality
+        self.media_type = RENDITION_FORMATS[image_format][1]
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rendition")
+        self.in_flight: Dict[str, asyncio.Future] = {}
+
+    def key(self, sha256: str, size: int) -> str:
+        # Format and quality are part of the key so a settings change never serves stale renditions
+        return f"{sha256}-{size}-{self.quality}.{self.image_format}"
+
+    def etag(self, sha256: str, size: int) -> str:
+        return f'"{sha256[:32]}-{size}-{self.quality}-{self.image_format}"'
+
+    def _render(self, key: str, size: int, load_source: Callable[[], bytes]) -> bytes:
+        data = render_rendition(load_source(), size, self.image_format, self.quality)
+        self.cache.put(key, data)
+        return data
+
+    async def get(self, sha256: str, size: int, load_source: Callable[[], bytes]) -> bytes:
+        """
+        load_source runs on the executor and is only called on a cache miss.
+        """
+        key = self.key(sha256, size)
+        data = await run_in_threadpool(self.cache.get, key)
+        if data is not None:
+            return data
+        future = self.in_flight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, self._render, key, size, load_source)
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def warm(self, sha256: str, source: bytes):
+        """
+        Renders every configured size ahead of the first request. Blocks, meant
+        for worker threads that just produced the source.
+        """
+        for size in self.sizes:
+            try:
+                self._render(self.key(sha256, size), size, lambda: source)
+            except Exception as e:
+                logger.error(f"Rendition {size} of {sha256} cannot be rendered: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "rendering": len(self.in_flight)}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_rendition_service: Optional[RenditionService] = None
+
+
+def get_rendition_service() -> RenditionService:
+    global _rendition_service
+    if _rendition_service is None:
+        settings = get_settings()
+        _rendition_service = RenditionService(DiskLRUCache(settings.rendition_cache_dir,
+                                                           settings.rendition_cache_max_bytes),
+                                              sizes=settings.thumbnail_sizes,
+                                              image_format=settings.thumbnail_format,
+                                              quality=settings.thumbnail_quality,
+                                              workers=settings.rendition_workers)
+    return _rendition_service
+
+
+def shutdown_rendition_service():
+    global _rendition_service
+    if _rendition_service is not None:
+        _rendition_service.shutdown()
+        _rendition_service = None
@@ -0,0 +1,49 @@
+import inspect
+import time
+from functools import wraps
+
+from utils.metrics.registry import Counter, Histogram
+
+DB_OPERATION_SECONDS = Histogram("db_operation_duration_seconds",
+                                 "Time spent in one database call, including waiting for a pooled connection",
+                                 ("collection", "operation"))
+DB_OPERATION_ERRORS = Counter("db_operation_errors_total", "Database calls that raised",
+                              ("collection", "operation"))
+
+
+def timed_operation(function):
+    """
+    Times a MongoDatabase or AsyncMongoDatabase method whose first argument
+    is the collection name, labelled by collection and method name.
+    """
+    operation = function.__name__
+
+    def record(collection_name: str, started: float, failed: bool):
+        DB_OPERATION_SECONDS.observe(time.perf_counter() - started, collection_name, operation)
+        if failed:
+            DB_OPERATION_ERRORS.inc(collection_name, operation)
+
+    if inspect.iscoroutinefunction(function):
+        @wraps(function)
+        async def async_wrapper(self, collection_name: str, *args, **kwargs):
+            started = time.perf_counter()
+            failed = True
+            try:
+                result = await function(self, collection_name, *args, **kwargs)
+                failed = False
+                return result
+            finally:
+                record(collection_name, started, failed)
+        return async_wrapper
+
+    @wraps(function)
+    def wrapper(self, collection_name: str, *args, **kwargs):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = function(self, collection_name, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            record(collection_name, started, failed)
+    return wrapper
@@ -0,0 +1,49 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.metrics.registry import Gauge, Histogram
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds",
+                            "Time from receiving a request to sending the last byte of its response",
+                            ("method", "route", "status"))
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being handled", ("method",))
+
+# Paths no route matched are grouped so scanners cannot create a series per URL
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware, a BaseHTTPMiddleware would add a task and a
+    stream copy to every request. The route label is the matched route's
+    path template, /image/{id}/content rather than each id.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc(method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec(method)
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                    method,
+                                    getattr(route, "path", UNMATCHED_ROUTE),
+                                    str(status_code))
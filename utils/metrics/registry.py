@@ -0,0 +1,161 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.logger.logger import logger
+
+# Seconds, from a cached lookup up to a slow upload or ffmpeg run
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """
+    One metric family. Label values are passed positionally in the order of
+    label_names; every update takes the metric's lock for a few dict
+    operations, cheap enough to leave on for every request.
+    """
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, values: Labels) -> Dict[str, str]:
+        return dict(zip(self.label_names, values))
+
+    def samples(self) -> Iterator[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield self.name, self.labels(labels), value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+
+class CallbackGauge(Metric):
+    """
+    Read at scrape time from a callback returning values by label tuple, for
+    numbers that already live elsewhere such as cache or pool stats.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...],
+                 callback: Callable[[], Dict[Labels, float]], metric_type: str = "gauge",
+                 registry: Optional["Registry"] = None):
+        super().__init__(name, documentation, label_names, registry)
+        self.type = metric_type
+        self.callback = callback
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, value in self.callback().items():
+            yield self.name, self.labels(labels), value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS, registry: Optional["Registry"] = None):
+        super().__init__(name, documentation, label_names, registry)
+        self.buckets = tuple(sorted(buckets))
+        # Per label tuple: a count for each bucket plus the +Inf one, then the sum
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = entry
+            counts[index] += 1
+            total[0] += value
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = [(labels, list(counts), total[0]) for labels, (counts, total) in self._values.items()]
+        for labels, counts, total in values:
+            label_dict = self.labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**label_dict, "le": format_value(bound)}, cumulative
+            yield f"{self.name}_count", label_dict, cumulative
+            yield f"{self.name}_sum", label_dict, total
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """
+        The Prometheus text exposition format. A metric whose callback fails is
+        left out of the scrape rather than failing all of it.
+        """
+        lines = []
+        for metric in self.metrics.values():
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                logger.error(f"Metric {metric.name} cannot be collected: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in samples:
+                if labels:
+                    label_text = ",".join(f'{key}="{escape_label(str(label))}"' for key, label in labels.items())
+                    lines.append(f"{name}{{{label_text}}} {format_value(value)}")
+                else:
+                    lines.append(f"{name} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
@@ -0,0 +1,85 @@
+"""
+Numbers the services already keep, read when /metrics is scraped so
+nothing is counted twice on the request path.
+"""
+from typing import Dict
+
+from anyio.to_thread import current_default_thread_limiter
+
+from utils.image.renditions import get_rendition_service
+from utils.metrics.registry import CallbackGauge, Labels
+from utils.notification.email_sender import get_email_sender
+from utils.security.password_hasher import get_password_hasher
+from utils.security.token_cache import token_cache
+from utils.security.user_cache import user_cache
+from utils.video.thumbnail_jobs import get_thumbnail_workers
+
+
+def cache_stats() -> Dict[str, Dict[str, float]]:
+    return {"users": user_cache.stats(), "tokens": token_cache.stats(), "renditions": get_rendition_service().stats()}
+
+
+def cache_values(key: str) -> Dict[Labels, float]:
+    return {(name,): stats[key] for name, stats in cache_stats().items()}
+
+
+def pool_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Busy and waiting work per pool. "default" is the threadpool behind
+    run_in_threadpool and sync routes, the rest are the services' own
+    executors; pending work beyond the worker count is waiting.
+    """
+    limiter = current_default_thread_limiter()
+    pools = {"default": {"busy": limiter.borrowed_tokens,
+                         "capacity": limiter.total_tokens,
+                         "waiting": limiter.statistics().tasks_waiting}}
+    hasher = get_password_hasher()
+    rendition_service = get_rendition_service()
+    pending = {"password_hasher": (hasher.pending, hasher.workers),
+               "rendition": (len(rendition_service.in_flight), rendition_service.workers)}
+    thumbnail_workers = get_thumbnail_workers()
+    if thumbnail_workers is not None:
+        pending["thumbnail"] = (thumbnail_workers.running, thumbnail_workers.workers)
+    for name, (count, workers) in pending.items():
+        pools[name] = {"busy": min(count, workers), "capacity": workers, "waiting": max(count - workers, 0)}
+    return pools
+
+
+def pool_values(key: str) -> Dict[Labels, float]:
+    return {(name,): stats[key] for name, stats in pool_stats().items()}
+
+
+def thumbnail_job_values() -> Dict[Labels, float]:
+    workers = get_thumbnail_workers()
+    if workers is None:
+        return {}
+    stats = workers.stats()
+    return {(result,): stats[result] for result in ("succeeded", "retried", "failed")}
+
+
+def email_values() -> Dict[Labels, float]:
+    stats = get_email_sender().stats()
+    return {(result,): stats[result] for result in ("sent", "retried", "failed", "rejected")}
+
+
+def email_queue_depth() -> Dict[Labels, float]:
+    stats = get_email_sender().stats()
+    return {(): stats["queued"] + stats["retrying"]}
+
+
+CallbackGauge("cache_hits_total", "Cache lookups that found an entry", ("cache",),
+              lambda: cache_values("hits"), metric_type="counter")
+CallbackGauge("cache_misses_total", "Cache lookups that found nothing", ("cache",),
+              lambda: cache_values("misses"), metric_type="counter")
+CallbackGauge("cache_entries", "Entries held by the cache", ("cache",), lambda: cache_values("size"))
+CallbackGauge("threadpool_busy_threads", "Threads running work", ("pool",), lambda: pool_values("busy"))
+CallbackGauge("threadpool_capacity_threads", "Threads the pool may run at once", ("pool",),
+              lambda: pool_values("capacity"))
+CallbackGauge("threadpool_waiting_tasks", "Work queued for a free thread", ("pool",), lambda: pool_values("waiting"))
+CallbackGauge("thumbnail_jobs_total", "Thumbnail jobs finished by this process", ("result",),
+              thumbnail_job_values, metric_type="counter")
+CallbackGauge("password_hash_rejected_total", "Password operations rejected with 503", (),
+              lambda: {(): get_password_hasher().rejected}, metric_type="counter")
+CallbackGauge("emails_total", "Emails handled by the background sender", ("result",), email_values,
+              metric_type="counter")
+CallbackGauge("email_queue_depth", "Emails waiting to be sent, including scheduled retries", (), email_queue_depth)
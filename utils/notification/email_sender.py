@@ -0,0 +1,243 @@
+import heapq
+import itertools
+import queue
+import smtplib
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from utils.environment.settings import get_settings
+from utils.logger.logger import logger
+from utils.metrics.registry import Histogram
+
+_STOP = object()
+
+EMAIL_SEND_SECONDS = Histogram("email_send_duration_seconds", "One SMTP send, including connecting and login when needed",
+                               ("result",))
+
+
+class OutboundEmail:
+    sender: str
+    recipient: str
+    message: str
+    attempts: int
+
+    def __init__(self, sender: str, recipient: str, message: str):
+        self.sender = sender
+        self.recipient = recipient
+        self.message = message
+        self.attempts = 0
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    # 5xx replies and refused recipients will not succeed on a retry, everything else might
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+
+class EmailSender:
+    """
+    Sends queued emails from one background thread that owns a single
+    authenticated SMTP connection. Whatever is queued when the thread wakes
+    up goes out over that connection, up to batch_size at a time. The
+    connection is closed after idle_seconds without mail and reopened on
+    demand. Failed sends are retried with exponential backoff.
+
+    The queue is in memory, mail still queued when the process stops is
+    dropped and logged.
+    """
+
+    def __init__(self, host: str, port: int, use_ssl: bool, username: Optional[str], password: Optional[str],
+                 timeout_seconds: float = 10, batch_size: int = 20, max_attempts: int = 5,
+                 retry_seconds: float = 2, idle_seconds: float = 60, queue_size: int = 1000):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.username = username
+        self.password = password
+        self.timeout_seconds = timeout_seconds
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.idle_seconds = idle_seconds
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        # Retries wait here ordered by when they are due, only the sender thread touches it
+        self._retries: List[Tuple[float, int, OutboundEmail]] = []
+        self._sequence = itertools.count()
+        self._connection: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.rejected = 0
+        self.connections = 0
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="email-sender", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stopping.set()
+        try:
+            # Wakes a thread waiting on an empty queue, a full one wakes it anyway and the flag stops it
+            self.queue.put_nowait(_STOP)
+        except queue.Full:
+            pass
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def enqueue(self, email: OutboundEmail):
+        try:
+            self.queue.put_nowait(email)
+        except queue.Full:
+            self.rejected += 1
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Too many emails waiting to be sent, please retry",
+                                headers={"Retry-After": "5"})
+
+    def _next_batch(self) -> Optional[List[OutboundEmail]]:
+        """
+        Blocks until there is mail, a retry is due or the connection has been
+        idle long enough to close. Returns None once stop was called.
+        """
+        if self._stopping.is_set():
+            return None
+        now = time.monotonic()
+        timeout = self.idle_seconds if self._connection is not None else None
+        if self._retries:
+            due_in = max(self._retries[0][0] - now, 0)
+            timeout = due_in if timeout is None else min(timeout, due_in)
+        batch = []
+        try:
+            item = self.queue.get(timeout=timeout)
+            while True:
+                if item is _STOP:
+                    return None
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                item = self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        now = time.monotonic()
+        while self._retries and self._retries[0][0] <= now and len(batch) < self.batch_size:
+            batch.append(heapq.heappop(self._retries)[2])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+            if batch:
+                for email in batch:
+                    self._send(email)
+            elif self._connection is not None and time.monotonic() - self._last_used >= self.idle_seconds:
+                self._close()
+        self._close()
+        dropped = self.queue.qsize() + len(self._retries)
+        if dropped:
+            logger.error(f"Email sender stopped with {dropped} emails not sent")
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._connection is None:
+            smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+            connection = smtp_class(self.host, self.port, timeout=self.timeout_seconds)
+            try:
+                if self.password:
+                    connection.login(self.username, self.password)
+            except Exception:
+                connection.close()
+                raise
+            self._connection = connection
+            self.connections += 1
+        return self._connection
+
+    def _close(self):
+        if self._connection is not None:
+            try:
+                self._connection.quit()
+            except (smtplib.SMTPException, OSError):
+                self._connection.close()
+            self._connection = None
+
+    def _send(self, email: OutboundEmail):
+        email.attempts += 1
+        started = time.monotonic()
+        try:
+            try:
+                reused = self._connection is not None
+                self._connect().sendmail(email.sender, email.recipient, email.message)
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped the idle connection, one fresh connection is not a retry
+                self._close()
+                if not reused:
+                    raise
+                self._connect().sendmail(email.sender, email.recipient, email.message)
+            self._last_used = time.monotonic()
+            self.sent += 1
+            EMAIL_SEND_SECONDS.observe(self._last_used - started, "sent")
+        except (smtplib.SMTPException, OSError) as e:
+            EMAIL_SEND_SECONDS.observe(time.monotonic() - started, "failed")
+            if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                self._close()
+            if is_permanent_failure(e) or email.attempts >= self.max_attempts:
+                self.failed += 1
+                logger.error(f"Email to {email.recipient} failed after {email.attempts} attempts: {e}")
+                return
+            delay = self.retry_seconds * 2 ** (email.attempts - 1)
+            heapq.heappush(self._retries, (time.monotonic() + delay, next(self._sequence), email))
+            self.retried += 1
+            logger.info(f"Email to {email.recipient} retries in {delay:.0f} s: {e}")
+        except Exception as e:
+            # Not a delivery problem, a bad message for instance, retrying would fail the same way
+            EMAIL_SEND_SECONDS.observe(time.monotonic() - started, "failed")
+            self._close()
+            self.failed += 1
+            logger.error(f"Email to {email.recipient} cannot be sent: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queue.qsize(),
+            "retrying": len(self._retries),
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "connections": self.connections,
+            "connected": self._connection is not None,
+        }
+
+
+_email_sender: Optional[EmailSender] = None
+
+
+def get_email_sender() -> EmailSender:
+    global _email_sender
+    if _email_sender is None:
+        settings = get_settings()
+        _email_sender = EmailSender(host=settings.smtp_host,
+                                    port=settings.smtp_port,
+                                    use_ssl=settings.smtp_ssl,
+                                    username=settings.email,
+                                    password=settings.email_password,
+                                    timeout_seconds=settings.smtp_timeout_seconds,
+                                    batch_size=settings.email_batch_size,
+                                    max_attempts=settings.email_max_attempts,
+                                    retry_seconds=settings.email_retry_seconds,
+                                    idle_seconds=settings.email_idle_seconds,
+                                    queue_size=settings.email_queue_size)
+        _email_sender.start()
+        logger.info(f"Email sender started for {settings.smtp_host}:{settings.smtp_port}")
+    return _email_sender
+
+
+def shutdown_email_sender():
+    global _email_sender
+    if _email_sender is not None:
+        _email_sender.stop()
+        _email_sender = None
@@ -1,10 +1,9 @@
-import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
-from utils.constants.environment_keys import EnvironmentKeys
-from utils.environment.environment_manager import EnvironmentManager
+from utils.environment.settings import get_settings
 from utils.logger.logger import logger
+from utils.notification.email_sender import OutboundEmail, get_email_sender
 
 
 class EmailMissingKeysException(Exception):
@@ -28,15 +27,10 @@ class OTPNotification(NotificationMessage):
         self.otp_code = otp_code
 
 
-def send_email_notification(notification_identifier: str, data: OTPNotification):
-    env_map = EnvironmentManager()
-    if env_map.get_key(EnvironmentKeys.EMAIL.value) is None or env_map.get_key(
-            EnvironmentKeys.EMAIL_PASSWORD.value) is None:
-        logger.error("Email or password keys in environment are missing or are named wrongly")
-        raise EmailMissingKeysException("Email server cannot be initialized")
+def build_email(sender: str, notification_identifier: str, data: OTPNotification) -> str:
     message = MIMEMultipart()
     message["To"] = notification_identifier
-    message["From"] = env_map.get_key(EnvironmentKeys.EMAIL.value)
+    message["From"] = sender
     message["Subject"] = 'Password Reset'
     title = '<h2> Your OTP Code </h2>'
     message_text = MIMEText(''' 
@@ -51,15 +45,19 @@ def send_email_notification(notification_identifier: str, data: OTPNotification)
        ''', 'html')
     message.attach(MIMEText(title, 'html'))
     message.attach(message_text)
+    return message.as_string()
+
 
-    with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp_server:
-        smtp_server.login(
-            env_map.get_key(EnvironmentKeys.EMAIL.value),
-            env_map.get_key(EnvironmentKeys.EMAIL_PASSWORD.value)
-        )
-        smtp_server.sendmail(
-            env_map.get_key(EnvironmentKeys.EMAIL.value),
-            notification_identifier,
-            message.as_string()
-        )
-    logger.info("Message sent!")
+def send_email_notification(notification_identifier: str, data: OTPNotification):
+    """
+    Queues the email for the background sender and returns without waiting
+    for the SMTP server.
+    """
+    settings = get_settings()
+    if settings.email is None or settings.email_password is None:
+        logger.error("Email or password keys in environment are missing or are named wrongly")
+        raise EmailMissingKeysException("Email server cannot be initialized")
+    get_email_sender().enqueue(OutboundEmail(settings.email,
+                                             notification_identifier,
+                                             build_email(settings.email, notification_identifier, data)))
+    logger.info("Message queued!")
@@ -0,0 +1,209 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.environment.settings import get_settings
+from utils.logger.logger import logger
+from utils.security.token_cache import is_admin_token
+
+PROFILE_HEADER = b"x-profile"
+REQUEST_ID_HEADER = b"x-request-id"
+PROFILE_ID_HEADER = b"x-profile-id"
+# Request ids become file names, other characters are dropped
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+UNSAFE_ID_CHARACTERS = re.compile(r"[^A-Za-z0-9_-]")
+# Room left in a 64 character id for "-" and 8 hex characters when the id is taken
+MAX_REQUESTED_ID_LENGTH = 55
+
+
+class ProfileNotFoundException(Exception):
+    pass
+
+
+class ProfileStore:
+    """
+    pstats files named by request id, each with a JSON file describing the
+    request. Only the newest max_profiles are kept.
+    """
+
+    def __init__(self, root: str, max_profiles: int):
+        self.root = root
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, profile_id: str) -> str:
+        if not REQUEST_ID_PATTERN.match(profile_id):
+            raise ProfileNotFoundException(f"Profile {profile_id} does not exist")
+        return os.path.join(self.root, f"{profile_id}.pstats")
+
+    def reserve(self, requested_id: str) -> str:
+        """
+        Claims a profile id for a new profile, the requested one when it is
+        free. The id comes from a client header, so it is cleaned and a taken
+        id gets a random suffix rather than overwriting the profile under it.
+        The info file is created exclusively, list skips it until save fills it.
+        """
+        requested_id = UNSAFE_ID_CHARACTERS.sub("", requested_id)[:MAX_REQUESTED_ID_LENGTH]
+        profile_id = requested_id or uuid.uuid4().hex
+        while True:
+            try:
+                os.close(os.open(f"{self.path(profile_id)}.json", os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return profile_id
+            except FileExistsError:
+                profile_id = f"{requested_id}-{uuid.uuid4().hex[:8]}" if requested_id else uuid.uuid4().hex
+
+    def save(self, profile_id: str, profiler: cProfile.Profile, info: Dict[str, Any]):
+        path = self.path(profile_id)
+        profiler.dump_stats(path)
+        with open(f"{path}.json", "w") as buffer:
+            json.dump(info, buffer)
+        with self._lock:
+            for old in self.list()[self.max_profiles:]:
+                self.remove(old["id"])
+
+    def remove(self, profile_id: str):
+        path = self.path(profile_id)
+        for file_path in (path, f"{path}.json"):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        profiles = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".pstats.json"):
+                continue
+            try:
+                with open(os.path.join(self.root, name)) as buffer:
+                    profiles.append(json.load(buffer))
+            except (FileNotFoundError, ValueError):
+                # Reserved and not saved yet
+                continue
+        return sorted(profiles, key=lambda profile: profile["created_at"], reverse=True)
+
+    def summary(self, profile_id: str, limit: int = 50) -> str:
+        path = self.path(profile_id)
+        if not os.path.exists(path):
+            raise ProfileNotFoundException(f"Profile {profile_id} does not exist")
+        output = io.StringIO()
+        pstats.Stats(path, stream=output).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return output.getvalue()
+
+
+class ProfilingMiddleware:
+    """
+    Profiles single requests with cProfile. A request is profiled when an
+    admin sends X-Profile: 1 or it falls in PROFILING_SAMPLE_RATE; any other
+    request only pays for a header scan. The profile id is the X-Request-ID
+    when one is sent, made unique by ProfileStore.reserve, and is returned in
+    X-Profile-Id.
+
+    cProfile records everything the event loop thread runs while it is
+    enabled, not just this request: other requests handled in the same window
+    land in the profile too. The profile's info records how many requests were
+    in flight, a profile taken alongside others is read with that in mind.
+    Work done on the threadpool shows up as time spent waiting. Only one
+    profiler can be enabled per thread, so one profile runs at a time.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore):
+        self.app = app
+        self.store = store
+        self.profiling = False
+        # Requests through this middleware, the profiled one included
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def should_profile(self, headers: Dict[bytes, bytes]) -> bool:
+        if self.profiling:
+            return False
+        if headers.get(PROFILE_HEADER) in (b"1", b"true"):
+            return is_admin_token(headers.get(b"authorization", b"").decode("latin-1"))
+        sample_rate = get_settings().profiling_sample_rate
+        return sample_rate > 0 and random.random() < sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            headers = dict(scope["headers"])
+            if self.should_profile(headers):
+                await self.profile(scope, receive, send, headers)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    async def profile(self, scope: Scope, receive: Receive, send: Send, headers: Dict[bytes, bytes]):
+        # Taken before the id is reserved, no other request starts a profile meanwhile
+        self.profiling = True
+        in_flight_at_start = self.in_flight
+        self.max_in_flight = self.in_flight
+        try:
+            request_id = await run_in_threadpool(self.store.reserve,
+                                                 headers.get(REQUEST_ID_HEADER, b"").decode("latin-1"))
+        except Exception as e:
+            self.profiling = False
+            logger.error(f"Profile id cannot be reserved: {e}")
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+
+        async def send_with_profile_id(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_ID_HEADER, request_id.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            self.profiling = False
+            info = {"id": request_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": (time.perf_counter() - started) * 1000,
+                    "in_flight_at_start": in_flight_at_start,
+                    "max_in_flight": self.max_in_flight,
+                    "created_at": datetime.utcnow().isoformat()}
+            try:
+                # The response is already sent, writing the profile does not delay it
+                await run_in_threadpool(self.store.save, request_id, profiler, info)
+                logger.info(f"Profiled {scope['method']} {scope['path']} as {request_id}")
+            except Exception as e:
+                logger.error(f"Profile {request_id} cannot be stored: {e}")
+                self.store.remove(request_id)
+
+
+_profile_store: Optional[ProfileStore] = None
+
+
+def get_profile_store() -> ProfileStore:
+    global _profile_store
+    if _profile_store is None:
+        settings = get_settings()
+        _profile_store = ProfileStore(settings.profiling_dir, settings.profiling_max_profiles)
+    return _profile_store
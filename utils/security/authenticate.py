@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from fastapi.security import OAuth2PasswordBearer, SecurityScopes
@@ -11,15 +10,21 @@ from pydantic import ValidationError
 from api.data.auth_data import TokenData, User
 from utils.constants.collection_name import CollectionName
 from utils.constants.environment_keys import EnvironmentKeys
-from utils.database.database import Database, get_db
-from utils.environment.environment_manager import EnvironmentManager, get_environment_manager
+from utils.database.async_database import AsyncDatabase, get_async_db
+from utils.environment.environment_manager import EnvironmentManager
+from utils.environment.settings import get_settings
+from utils.security.password_hasher import crypt_context, hash_password, get_password_hasher
+from utils.security.token_cache import decode_token
+from utils.security.user_cache import get_cached_user, cache_user
 
 
 class BearAuthException(Exception):
     pass
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# The password hash never leaves authenticate_user
+CURRENT_USER_PROJECTION = {"password": 0}
+
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="auth/login",
@@ -28,11 +33,11 @@ oauth2_scheme = OAuth2PasswordBearer(
 
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return crypt_context(get_settings().bcrypt_rounds).verify(plain_password, hashed_password)
 
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return hash_password(password, get_settings().bcrypt_rounds)
 
 
 def create_access_token(
@@ -56,14 +61,9 @@ def create_access_token(
 
 def get_token_payload(
         token: str = Depends(oauth2_scheme),
-        env_manager: EnvironmentManager = Depends(get_environment_manager)
 ):
     try:
-        payload = jwt.decode(
-            token,
-            env_manager.get_key(EnvironmentKeys.SECRET_KEY.value),
-            algorithms=[env_manager.get_key(EnvironmentKeys.ALGORITHM.value)]
-        )
+        payload = decode_token(token)
         payload_sub: str = payload.get("sub")
         if payload_sub is None:
             raise BearAuthException("Token could not be validated")
@@ -72,20 +72,24 @@ def get_token_payload(
         raise BearAuthException("Token could not be validated")
 
 
-def authenticate_user(db: Database, username: str = "", password: str = ""):
-    users: User = db.get_object(CollectionName.USER.value, {"username": username})
-    if not users:
+async def authenticate_user(db: AsyncDatabase, username: str = "", password: str = ""):
+    user = await db.get_single_object(CollectionName.USER.value, {"username": username},
+                                      projection={"password": 1, "scopes": 1})
+    if not user:
         return False
-    if not verify_password(password, users[0]["password"]):
+    verified, new_hash = await get_password_hasher().verify(password, user["password"])
+    if not verified:
         return False
-    return users[0]
+    if new_hash is not None:
+        # The configured bcrypt cost changed since this hash was made
+        await db.update_object(CollectionName.USER.value, {"_id": user["_id"]}, {"password": new_hash})
+    return user
 
 
-def get_current_user(
+async def get_current_user(
         security_scopes: SecurityScopes,
-        db: Database = Depends(get_db),
+        db: AsyncDatabase = Depends(get_async_db),
         token: str = Depends(oauth2_scheme),
-        env_manager: EnvironmentManager = Depends(get_environment_manager)
 ) -> User:
     if security_scopes.scopes:
         authenticate_value = f'Bearer scope="{security_scopes.scope_str}"'
@@ -97,11 +101,7 @@ def get_current_user(
         headers={"WWW-Authenticate": authenticate_value},
     )
     try:
-        payload = jwt.decode(
-            token,
-            env_manager.get_key(EnvironmentKeys.SECRET_KEY.value),
-            algorithms=[env_manager.get_key(EnvironmentKeys.ALGORITHM.value)]
-        )
+        payload = decode_token(token)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
@@ -109,10 +109,14 @@ def get_current_user(
         token_data = TokenData(scopes=token_scopes, username=username)
     except (JWTError, ValidationError):
         raise credentials_exception
-    users = db.get_object(CollectionName.USER.value, {"username": username})
-    if users is None or len(users) == 0:
-        raise credentials_exception
+    user = get_cached_user(username)
+    if user is None:
+        user = await db.get_single_object(CollectionName.USER.value, {"username": username},
+                                          projection=CURRENT_USER_PROJECTION)
+        if user is None:
+            raise credentials_exception
+        cache_user(username, user)
     for scope in security_scopes.scopes:
         if scope not in token_data.scopes:
             raise credentials_exception
-    return users[0]
+    return user
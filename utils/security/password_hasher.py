@@ -0,0 +1,111 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from utils.environment.settings import get_settings
+from utils.logger.logger import logger
+from utils.metrics.registry import Histogram
+
+PASSWORD_HASH_SECONDS = Histogram("password_hash_duration_seconds", "bcrypt hash or verify, including the executor queue",
+                                  ("operation",))
+
+
+@lru_cache(maxsize=None)
+def crypt_context(rounds: int) -> CryptContext:
+    # Pinning min and max to the configured cost makes needs_update flag hashes made with any other cost
+    return CryptContext(schemes=["bcrypt"],
+                        deprecated="auto",
+                        bcrypt__default_rounds=rounds,
+                        bcrypt__min_rounds=rounds,
+                        bcrypt__max_rounds=rounds)
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return crypt_context(rounds).hash(password)
+
+
+def verify_and_update_password(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    """
+    Returns whether the password matches and, when the stored hash was made with
+    another cost, a new hash to store in its place.
+    """
+    return crypt_context(rounds).verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on its own bounded executor so a burst of logins cannot take
+    over the threadpool that serves every other sync call. Requests beyond
+    max_pending are rejected with 503 instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int, use_processes: bool, max_pending: int, rounds: int):
+        self.workers = workers
+        self.use_processes = use_processes
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.pending = 0
+        self.rejected = 0
+        self.executor: Executor = (ProcessPoolExecutor(max_workers=workers) if use_processes
+                                   else ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher"))
+
+    async def _run(self, operation: str, fn, *args):
+        # pending is only touched from the event loop thread, no lock needed
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Too many password operations, please retry",
+                                headers={"Retry-After": "1"})
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+            PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, operation)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run("verify", verify_and_update_password, password, hashed_password, self.rounds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "workers": self.workers,
+            "processes": self.use_processes,
+            "rejected": self.rejected,
+            "rounds": self.rounds,
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_password_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _password_hasher
+    if _password_hasher is None:
+        settings = get_settings()
+        _password_hasher = PasswordHasher(workers=settings.password_hash_workers,
+                                          use_processes=settings.password_hash_processes,
+                                          max_pending=settings.password_hash_max_pending,
+                                          rounds=settings.bcrypt_rounds)
+        logger.info(f"Password hasher started with {settings.password_hash_workers} workers")
+    return _password_hasher
+
+
+def shutdown_password_hasher():
+    global _password_hasher
+    if _password_hasher is not None:
+        _password_hasher.shutdown()
+        _password_hasher = None
@@ -0,0 +1,74 @@
+import hashlib
+import time
+from typing import Any, Dict, Optional
+
+from jose import JWTError, jwt
+
+from utils.cache.ttl_cache import TTLCache
+from utils.environment.settings import Settings, get_settings, add_reload_listener
+from utils.security.scopes import UserScopes
+
+ADMIN_SCOPES = {UserScopes.ADMIN_MASTER.value, UserScopes.ADMIN.value}
+
+
+def _create_token_cache() -> TTLCache:
+    settings = get_settings()
+    return TTLCache(max_size=settings.token_cache_size, ttl=settings.token_cache_ttl_seconds)
+
+
+# Claims of tokens whose signature was already verified, keyed by a digest of the token
+token_cache = _create_token_cache()
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """
+    Returns the verified claims of the token, raises JWTError like jwt.decode.
+    A cached entry never outlives the exp claim of its token.
+    """
+    key = _token_key(token)
+    payload = token_cache.get(key)
+    if payload is not None:
+        return dict(payload)
+    settings = get_settings()
+    payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    expires_at = payload.get("exp")
+    if expires_at is not None:
+        token_cache.put(key, payload, ttl=expires_at - time.time())
+    return dict(payload)
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    return authorization[7:].strip()
+
+
+def is_admin_token(authorization: Optional[str]) -> bool:
+    """
+    For checks outside the routes' Security dependency. Only the signature
+    and scopes are checked, the user is not looked up.
+    """
+    token = bearer_token(authorization)
+    if token is None:
+        return False
+    try:
+        scopes = decode_token(token).get("scopes", [])
+    except JWTError:
+        return False
+    return bool(ADMIN_SCOPES & set(scopes))
+
+
+def flush_token_cache():
+    token_cache.clear()
+
+
+def _flush_on_reload(settings: Settings):
+    # The secret or algorithm may have changed, claims verified with the old one are stale
+    flush_token_cache()
+
+
+add_reload_listener(_flush_on_reload)
@@ -0,0 +1,27 @@
+from typing import Any, Dict, Optional
+
+from utils.cache.ttl_cache import TTLCache
+from utils.environment.settings import get_settings
+
+
+def _create_user_cache() -> TTLCache:
+    settings = get_settings()
+    return TTLCache(max_size=settings.user_cache_size, ttl=settings.user_cache_ttl_seconds)
+
+
+# Users loaded by get_current_user keyed by username, the TTL bounds how long a
+# change made by another worker process can go unnoticed
+user_cache = _create_user_cache()
+
+
+def get_cached_user(username: str) -> Optional[Dict[str, Any]]:
+    user = user_cache.get(username)
+    return dict(user) if user is not None else None
+
+
+def cache_user(username: str, user: Dict[str, Any]):
+    user_cache.put(username, dict(user))
+
+
+def invalidate_user(username: str):
+    user_cache.invalidate(username)
@@ -0,0 +1,59 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict
+
+from starlette.concurrency import run_in_threadpool
+
+from utils.constants.collection_name import CollectionName
+from utils.database.async_database import AsyncDatabase, create_async_database
+from utils.database.database import DATABASE_NAME
+from utils.environment.settings import get_settings
+from utils.logger.logger import logger
+from utils.storage.blob_store import BlobStore, get_image_store
+from utils.video.blob_store import video_blob_store
+
+GC_BATCH_SIZE = 500
+
+
+async def collect_deleted_images(db: AsyncDatabase, store: BlobStore, retention_seconds: float) -> int:
+    """
+    Deletes the stored bytes of Images records, images and video thumbnails,
+    soft deleted more than retention_seconds ago. Records keep their metadata
+    with image_key cleared. Keys are never shared between records, the one
+    that clears image_key deletes the blob.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=retention_seconds)
+    removed = 0
+    while True:
+        objs = await db.get_object(CollectionName.IMAGES.value,
+                                   {"image_key": {"$type": "string"}, "deleted_at": {"$lt": cutoff}},
+                                   show_deleted=True,
+                                   projection={"image_key": 1},
+                                   limit=GC_BATCH_SIZE)
+        for obj in objs:
+            # Cleared first, a crash in between leaves an unreferenced file rather than a record without its bytes
+            if not await db.update_object(CollectionName.IMAGES.value,
+                                          {"_id": obj["_id"], "image_key": obj["image_key"]},
+                                          {"image_key": None}):
+                continue
+            await run_in_threadpool(store.delete, obj["image_key"])
+            removed += 1
+        if len(objs) < GC_BATCH_SIZE:
+            return removed
+
+
+async def collect_blobs(db: AsyncDatabase) -> Dict[str, int]:
+    return {"videos": await video_blob_store.collect_garbage(db),
+            "images": await collect_deleted_images(db, get_image_store(),
+                                                   get_settings().image_blob_retention_seconds)}
+
+
+async def run_blob_gc(interval_seconds: float):
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            removed = await collect_blobs(create_async_database(DATABASE_NAME))
+            if any(removed.values()):
+                logger.info(f"Removed {removed['videos']} video blobs and {removed['images']} deleted images")
+        except Exception as e:
+            logger.error(f"Blob garbage collection failed: {e}")
@@ -0,0 +1,176 @@
+import hashlib
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+
+from bson import ObjectId
+from gridfs import GridFSBucket
+from gridfs.errors import NoFile
+
+from utils.database.client import get_client
+from utils.database.database import DATABASE_NAME
+from utils.environment.settings import get_settings
+
+LOCAL_BACKEND = "local"
+GRIDFS_BACKEND = "gridfs"
+CHUNK_SIZE = 256 * 1024
+
+
+class BlobNotFoundException(Exception):
+    pass
+
+
+class StoredBlob:
+    key: str
+    size: int
+    sha256: str
+
+    def __init__(self, key: str, size: int, sha256: str):
+        self.key = key
+        self.size = size
+        self.sha256 = sha256
+
+
+class HashingReader:
+    """
+    File like wrapper that hashes and counts what the store reads, so the
+    digest comes out of the same single pass that writes the blob.
+    """
+
+    def __init__(self, source: BinaryIO):
+        self.source = source
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.source.read(size)
+        self.digest.update(chunk)
+        self.size += len(chunk)
+        return chunk
+
+
+def sharded_path(root: str, key: str) -> str:
+    # Two directory levels from the key keep any one directory small
+    return os.path.join(root, key[:2], key[2:4], key)
+
+
+@contextmanager
+def atomic_file(path: str) -> Iterator[BinaryIO]:
+    """
+    Writes go to a temporary file next to path that is renamed over it when
+    the block exits, so readers see the old file or the complete new one and
+    never a partial one. The temporary file is removed if the block fails.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            yield buffer
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def move_into_place(source_path: str, path: str):
+    # A rename on the same filesystem, as atomic as the write above
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(source_path, path)
+
+
+class BlobStore:
+    """
+    Opaque keys to raw bytes. Calls block, the routes run them in the threadpool.
+    """
+
+    def put(self, source: BinaryIO) -> StoredBlob:
+        raise NotImplementedError
+
+    def open(self, key: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        # Set when the blob is a plain file, the routes can then let the server send it directly
+        return None
+
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        with self.open(key) as source:
+            while chunk := source.read(chunk_size):
+                yield chunk
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return sharded_path(self.root, key)
+
+    def put(self, source: BinaryIO) -> StoredBlob:
+        key = uuid.uuid4().hex
+        reader = HashingReader(source)
+        with atomic_file(self.path(key)) as buffer:
+            while chunk := reader.read(CHUNK_SIZE):
+                buffer.write(chunk)
+        return StoredBlob(key, reader.size, reader.digest.hexdigest())
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return open(self.path(key), "rb")
+        except FileNotFoundError:
+            raise BlobNotFoundException(key)
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self.path(key)
+
+
+class GridFSBlobStore(BlobStore):
+    def __init__(self, bucket_name: str):
+        self.bucket_name = bucket_name
+
+    def bucket(self) -> GridFSBucket:
+        return GridFSBucket(get_client().get_database(DATABASE_NAME), bucket_name=self.bucket_name)
+
+    def put(self, source: BinaryIO) -> StoredBlob:
+        file_id = ObjectId()
+        reader = HashingReader(source)
+        self.bucket().upload_from_stream_with_id(file_id, str(file_id), reader)
+        return StoredBlob(str(file_id), reader.size, reader.digest.hexdigest())
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return self.bucket().open_download_stream(ObjectId(key))
+        except NoFile:
+            raise BlobNotFoundException(key)
+
+    def delete(self, key: str):
+        try:
+            self.bucket().delete(ObjectId(key))
+        except NoFile:
+            pass
+
+
+_image_store: Optional[BlobStore] = None
+
+
+def get_image_store() -> BlobStore:
+    global _image_store
+    if _image_store is None:
+        settings = get_settings()
+        if settings.image_store_backend == GRIDFS_BACKEND:
+            _image_store = GridFSBlobStore("images")
+        else:
+            _image_store = LocalBlobStore(settings.image_store_dir)
+    return _image_store
@@ -0,0 +1,92 @@
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from utils.constants.collection_name import CollectionName
+from utils.database.async_database import AsyncDatabase
+from utils.storage.blob_store import move_into_place, sharded_path
+
+
+class VideoBlobStore:
+    """
+    Content addressed video files. A blob lives at <root>/ab/cd/<sha256> and
+    its VideoBlobs document counts the Images records pointing at it, so the
+    same bytes are stored once however many times they are uploaded.
+
+    add pins the blob before moving the file in, collect_garbage tombstones a
+    blob before moving its file out and restores it if an add revived the
+    blob in between. Either order leaves the file in place for a live blob.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+
+    def path(self, digest: str) -> str:
+        return sharded_path(self.root, digest)
+
+    def temp_path(self) -> str:
+        # Uploads are written here first, the digest is only known once the last byte is in
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        return os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.part")
+
+    async def add(self, db: AsyncDatabase, source_path: str, digest: str, size: int) -> str:
+        """
+        Takes a reference on the blob and moves source_path into place. When the
+        blob already exists the source replaces it with the same bytes. The
+        reference is dropped again if the move fails.
+        """
+        await db.increment_object(CollectionName.VIDEO_BLOBS.value,
+                                  {"_id": digest},
+                                  {"refcount": 1},
+                                  {"is_deleted": False, "size": size},
+                                  upsert=True)
+        path = self.path(digest)
+        try:
+            await run_in_threadpool(move_into_place, source_path, path)
+        except BaseException:
+            # The file never made it in, the reference goes with it
+            await self.release(db, digest)
+            raise
+        return path
+
+    async def release(self, db: AsyncDatabase, digest: str) -> Optional[Dict[str, Any]]:
+        return await db.increment_object(CollectionName.VIDEO_BLOBS.value,
+                                         {"_id": digest, "refcount": {"$gt": 0}},
+                                         {"refcount": -1},
+                                         {"released_at": datetime.utcnow()})
+
+    async def collect_garbage(self, db: AsyncDatabase) -> int:
+        unreferenced = await db.get_object(CollectionName.VIDEO_BLOBS.value,
+                                           {"refcount": {"$lte": 0}},
+                                           projection={"_id": 1})
+        removed = 0
+        for blob in unreferenced:
+            digest = blob["_id"]
+            tombstoned = await db.claim_object(CollectionName.VIDEO_BLOBS.value,
+                                               {"_id": digest, "refcount": {"$lte": 0}},
+                                               {"is_deleted": True, "deleted_at": datetime.utcnow()})
+            if tombstoned is None:
+                continue
+            path = self.path(digest)
+            trash_path = f"{path}.{uuid.uuid4().hex}.gc"
+            try:
+                await run_in_threadpool(os.replace, path, trash_path)
+            except FileNotFoundError:
+                continue
+            if await db.exists(CollectionName.VIDEO_BLOBS.value, {"_id": digest}):
+                # An upload took a reference after the tombstone, put the file back unless it already did
+                if await run_in_threadpool(os.path.exists, path):
+                    await run_in_threadpool(os.remove, trash_path)
+                else:
+                    await run_in_threadpool(os.replace, trash_path, path)
+                continue
+            await run_in_threadpool(os.remove, trash_path)
+            removed += 1
+        return removed
+
+
+video_blob_store = VideoBlobStore(os.path.join("uploaded_videos", "blobs"))
@@ -1,16 +1,22 @@
+import subprocess
 from io import BytesIO
 
 import ffmpeg
 
 
-def extract_thumbnail(video_path: str) -> BytesIO:
+def extract_thumbnail(video_path: str, timeout: float = None) -> BytesIO:
     process = (
         ffmpeg
         .input(video_path, ss=1)
         .output('pipe:', vframes=1, format='image2', vcodec='png')
         .run_async(pipe_stdout=True, pipe_stderr=True)
     )
-    out, err = process.communicate()
+    try:
+        out, err = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+        raise RuntimeError(f"ffmpeg did not finish in {timeout} seconds")
     if process.returncode != 0:
         raise RuntimeError(f"ffmpeg error: {err.decode()}")
     return BytesIO(out)
@@ -0,0 +1,279 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING
+from starlette.concurrency import run_in_threadpool
+
+from utils.constants.collection_name import CollectionName
+from utils.constants.processing_status import JobStatus, ProcessingStatus
+from utils.database.async_database import AsyncDatabase, create_async_database
+from utils.database.database import DATABASE_NAME
+from utils.environment.settings import get_settings
+from utils.image.image_store import store_image_bytes
+from utils.image.renditions import get_rendition_service
+from utils.logger.logger import logger
+from utils.metrics.registry import Histogram
+from utils.storage.blob_store import get_image_store
+from utils.video.thumbnail import extract_thumbnail
+
+# A claimed job is handed to another worker once its lock runs out, this covers a worker that died mid job
+LOCK_GRACE_SECONDS = 30
+# Done and failed jobs are kept this long for the admin stats, then a TTL index removes them
+FINISHED_JOB_RETENTION_SECONDS = 7 * 24 * 60 * 60
+
+THUMBNAIL_JOB_SECONDS = Histogram("thumbnail_job_duration_seconds", "ffmpeg extraction and image store write per job",
+                                  ("status",))
+
+
+class PermanentJobError(Exception):
+    pass
+
+
+def render_thumbnail(video_path: str, timeout: float) -> Dict[str, Any]:
+    if not os.path.exists(video_path):
+        raise PermanentJobError(f"{video_path} does not exist")
+    # ffmpeg already writes a PNG, it goes to the image store as is and the grid sizes are rendered from it
+    thumbnail = extract_thumbnail(video_path, timeout).getvalue()
+    fields = store_image_bytes(get_image_store(), thumbnail)
+    get_rendition_service().warm(fields["image_sha256"], thumbnail)
+    return fields
+
+
+async def enqueue_thumbnail_job(db: AsyncDatabase, image_id: ObjectId, file_path: str) -> ObjectId:
+    job_id = await db.insert_object(CollectionName.THUMBNAIL_JOBS.value, {
+        "image_id": image_id,
+        "file_path": file_path,
+        "status": JobStatus.QUEUED.value,
+        "attempts": 0,
+        "available_at": datetime.utcnow(),
+        "locked_until": None,
+        "created_at": datetime.utcnow(),
+    })
+    if _thumbnail_workers is not None:
+        _thumbnail_workers.notify()
+    return job_id
+
+
+async def claim_thumbnail_job(db: AsyncDatabase, worker: str, timeout_seconds: float,
+                              max_attempts: int) -> Optional[Dict[str, Any]]:
+    now = datetime.utcnow()
+    return await db.claim_object(CollectionName.THUMBNAIL_JOBS.value,
+                                 {"$or": [{"status": JobStatus.QUEUED.value, "available_at": {"$lte": now}},
+                                          {"status": JobStatus.RUNNING.value, "locked_until": {"$lt": now},
+                                           "attempts": {"$lt": max_attempts}}]},
+                                 {"status": JobStatus.RUNNING.value,
+                                  "worker": worker,
+                                  "started_at": now,
+                                  "locked_until": now + timedelta(seconds=timeout_seconds + LOCK_GRACE_SECONDS)},
+                                 sort=[("available_at", ASCENDING)],
+                                 increment={"attempts": 1})
+
+
+async def fail_abandoned_thumbnail_job(db: AsyncDatabase, max_attempts: int) -> Optional[Dict[str, Any]]:
+    """
+    A job whose lock ran out on its last attempt took its worker down every
+    time, it is failed rather than claimed again.
+    """
+    now = datetime.utcnow()
+    job = await db.claim_object(CollectionName.THUMBNAIL_JOBS.value,
+                                {"status": JobStatus.RUNNING.value, "locked_until": {"$lt": now},
+                                 "attempts": {"$gte": max_attempts}},
+                                {"status": JobStatus.FAILED.value,
+                                 "locked_until": None,
+                                 "finished_at": now,
+                                 "expires_at": now + timedelta(seconds=FINISHED_JOB_RETENTION_SECONDS),
+                                 "error": "The worker stopped during every attempt"})
+    if job is not None:
+        await db.update_object(CollectionName.IMAGES.value,
+                               {"_id": job["image_id"], "is_deleted": False},
+                               {"processing_status": ProcessingStatus.FAILED.value,
+                                "processing_error": "The worker stopped during every attempt"})
+    return job
+
+
+class ThumbnailWorkerPool:
+    """
+    Drains the ThumbnailJobs collection. Each worker claims one job at a time
+    and runs ffmpeg and the store write on the pool's own executor, so at most
+    `workers` extractions run per process and the event loop never waits on
+    them. Jobs live in Mongo, a restart picks up whatever was left queued or
+    was running when the process stopped.
+    """
+
+    def __init__(self, workers: int, max_attempts: int, timeout_seconds: float, retry_seconds: float,
+                 poll_seconds: float):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.timeout_seconds = timeout_seconds
+        self.retry_seconds = retry_seconds
+        self.poll_seconds = poll_seconds
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self.wakeup = asyncio.Event()
+        self.tasks: List[asyncio.Task] = []
+        self.running = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.total_duration_ms = 0.0
+        self.max_duration_ms = 0.0
+
+    def start(self):
+        for index in range(self.workers):
+            self.tasks.append(asyncio.create_task(self._work(f"{os.getpid()}-{index}")))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def notify(self):
+        # Wakes idle workers so a new job does not wait for the next poll
+        self.wakeup.set()
+
+    async def _work(self, worker: str):
+        db = create_async_database(DATABASE_NAME)
+        while True:
+            try:
+                job = await claim_thumbnail_job(db, worker, self.timeout_seconds, self.max_attempts)
+                if job is None and await fail_abandoned_thumbnail_job(db, self.max_attempts) is not None:
+                    self.failed += 1
+                    continue
+            except Exception as e:
+                logger.error(f"Thumbnail job cannot be claimed: {e}")
+                job = None
+            if job is None:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(db, job)
+            except Exception as e:
+                # The lock runs out and another worker retries the job
+                logger.error(f"Thumbnail job {job['_id']} cannot be recorded: {e}")
+
+    async def _run(self, db: AsyncDatabase, job: Dict[str, Any]):
+        self.running += 1
+        started = time.perf_counter()
+        try:
+            thumbnail = await asyncio.get_running_loop().run_in_executor(self.executor, render_thumbnail,
+                                                                         job["file_path"], self.timeout_seconds)
+            error = None
+        except Exception as e:
+            thumbnail = None
+            error = e
+        finally:
+            self.running -= 1
+        duration_ms = (time.perf_counter() - started) * 1000
+        self.total_duration_ms += duration_ms
+        self.max_duration_ms = max(self.max_duration_ms, duration_ms)
+        THUMBNAIL_JOB_SECONDS.observe(duration_ms / 1000, "succeeded" if error is None else "failed")
+
+        if error is None:
+            # A worker that outlived its lock lost the job to a later claim, only the holder records a thumbnail
+            if not await self._finish(db, job, JobStatus.DONE, duration_ms):
+                await run_in_threadpool(get_image_store().delete, thumbnail["image_key"])
+                logger.info(f"Thumbnail job {job['_id']} was claimed again, attempt {job['attempts']} discarded")
+                return
+            recorded = await db.update_object(CollectionName.IMAGES.value,
+                                              {"_id": job["image_id"], "is_deleted": False},
+                                              {**thumbnail, "processing_status": ProcessingStatus.READY.value})
+            if not recorded:
+                # The video was deleted while the job ran, nothing points at the thumbnail
+                await run_in_threadpool(get_image_store().delete, thumbnail["image_key"])
+            self.succeeded += 1
+            logger.info(f"Thumbnail job {job['_id']} done in {duration_ms:.0f} ms")
+        elif isinstance(error, PermanentJobError) or job["attempts"] >= self.max_attempts:
+            if not await self._finish(db, job, JobStatus.FAILED, duration_ms, error):
+                return
+            await db.update_object(CollectionName.IMAGES.value,
+                                   {"_id": job["image_id"], "is_deleted": False},
+                                   {"processing_status": ProcessingStatus.FAILED.value,
+                                    "processing_error": str(error)})
+            self.failed += 1
+            logger.error(f"Thumbnail job {job['_id']} failed after {job['attempts']} attempts: {error}")
+        else:
+            # Backs off exponentially, 1x, 2x, 4x the retry delay
+            delay = self.retry_seconds * 2 ** (job["attempts"] - 1)
+            if not await self._finish(db, job, JobStatus.QUEUED, duration_ms, error,
+                                      available_at=datetime.utcnow() + timedelta(seconds=delay)):
+                return
+            self.retried += 1
+            logger.info(f"Thumbnail job {job['_id']} retries in {delay:.0f} s: {error}")
+
+    @staticmethod
+    async def _finish(db: AsyncDatabase, job: Dict[str, Any], status: JobStatus, duration_ms: float,
+                      error: Exception = None, available_at: datetime = None) -> bool:
+        """
+        Records the outcome only while the job is still this claim's: every
+        claim increments attempts, so a job claimed again after its lock ran
+        out no longer matches. Returns whether the outcome was recorded.
+        """
+        new_data = {"status": status.value,
+                    "locked_until": None,
+                    "finished_at": datetime.utcnow(),
+                    "duration_ms": duration_ms,
+                    "error": str(error) if error is not None else None}
+        if available_at is not None:
+            new_data["available_at"] = available_at
+        if status in (JobStatus.DONE, JobStatus.FAILED):
+            new_data["expires_at"] = datetime.utcnow() + timedelta(seconds=FINISHED_JOB_RETENTION_SECONDS)
+        matched = await db.update_object(CollectionName.THUMBNAIL_JOBS.value,
+                                         {"_id": job["_id"], "status": JobStatus.RUNNING.value,
+                                          "attempts": job["attempts"]},
+                                         new_data)
+        return bool(matched)
+
+    def stats(self) -> Dict[str, Any]:
+        processed = self.succeeded + self.retried + self.failed
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "mean_duration_ms": self.total_duration_ms / processed if processed else 0.0,
+            "max_duration_ms": self.max_duration_ms,
+        }
+
+
+_thumbnail_workers: Optional[ThumbnailWorkerPool] = None
+
+
+def start_thumbnail_workers() -> ThumbnailWorkerPool:
+    global _thumbnail_workers
+    if _thumbnail_workers is None:
+        settings = get_settings()
+        _thumbnail_workers = ThumbnailWorkerPool(workers=settings.thumbnail_workers,
+                                                 max_attempts=settings.thumbnail_job_max_attempts,
+                                                 timeout_seconds=settings.thumbnail_job_timeout_seconds,
+                                                 retry_seconds=settings.thumbnail_job_retry_seconds,
+                                                 poll_seconds=settings.thumbnail_job_poll_seconds)
+        _thumbnail_workers.start()
+        logger.info(f"Thumbnail workers started with {settings.thumbnail_workers} workers")
+    return _thumbnail_workers
+
+
+def get_thumbnail_workers() -> Optional[ThumbnailWorkerPool]:
+    return _thumbnail_workers
+
+
+async def stop_thumbnail_workers():
+    global _thumbnail_workers
+    if _thumbnail_workers is not None:
+        await _thumbnail_workers.stop()
+        _thumbnail_workers = None
+
+
+async def thumbnail_job_counts(db: AsyncDatabase) -> Dict[str, int]:
+    return {status.value: await db.count_objects(CollectionName.THUMBNAIL_JOBS.value, {"status": status.value})
+            for status in JobStatus}
@@ -0,0 +1,170 @@
+import hashlib
+from typing import AsyncIterator, Dict, List, Optional
+
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+from utils.storage.blob_store import atomic_file
+
+# Multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeException(Exception):
+    pass
+
+
+class InvalidUploadException(Exception):
+    pass
+
+
+class StoredUpload:
+    path: str
+    size: int
+    sha256: str
+
+    def __init__(self, path: str, size: int, sha256: str):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+
+
+class ReceivedFile:
+    stored: StoredUpload
+    filename: str
+    content_type: str
+
+    def __init__(self, stored: StoredUpload, filename: str, content_type: str):
+        self.stored = stored
+        self.filename = filename
+        self.content_type = content_type
+
+
+class _VideoPartReader:
+    """
+    python_multipart callbacks. The parser calls them synchronously, so the
+    data of the video part is only collected here and written by the loop
+    in stream_multipart_to_file. Other parts are skipped.
+    """
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name.encode()
+        self.header_name = b""
+        self.header_value = b""
+        self.headers: Dict[bytes, bytes] = {}
+        self.in_file = False
+        self.found = False
+        self.complete = False
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.pending: List[bytes] = []
+        self.pending_bytes = 0
+
+    def callbacks(self):
+        return {"on_part_begin": self.on_part_begin,
+                "on_part_data": self.on_part_data,
+                "on_part_end": self.on_part_end,
+                "on_header_field": self.on_header_field,
+                "on_header_value": self.on_header_value,
+                "on_header_end": self.on_header_end,
+                "on_headers_finished": self.on_headers_finished,
+                "on_end": self.on_end}
+
+    def on_part_begin(self):
+        self.headers = {}
+        self.in_file = False
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self.header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.headers[self.header_name.lower()] = self.header_value
+        self.header_name = b""
+        self.header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.headers.get(b"content-disposition", b""))
+        if options.get(b"name") != self.field_name or b"filename" not in options:
+            return
+        if self.found:
+            raise InvalidUploadException("Only one file can be uploaded")
+        content_type = self.headers.get(b"content-type", b"").decode("latin-1")
+        if not content_type.startswith("video/"):
+            raise InvalidUploadException("File is not a video")
+        self.found = self.in_file = True
+        self.filename = options[b"filename"].decode("utf-8", errors="replace")
+        self.content_type = content_type
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self.in_file:
+            self.pending.append(data[start:end])
+            self.pending_bytes += end - start
+
+    def on_part_end(self):
+        self.in_file = False
+
+    def on_end(self):
+        self.complete = True
+
+    def take_pending(self) -> bytes:
+        data = b"".join(self.pending)
+        self.pending.clear()
+        self.pending_bytes = 0
+        return data
+
+
+def _write_chunk(buffer, digest, chunk: bytes):
+    digest.update(chunk)
+    buffer.write(chunk)
+
+
+async def stream_multipart_to_file(
+        stream: AsyncIterator[bytes],
+        content_type: str,
+        field_name: str,
+        destination: str,
+        max_bytes: int = 0,
+        chunk_size: int = 1024 * 1024
+) -> ReceivedFile:
+    """
+    Parses a multipart/form-data body as it is received and writes the video
+    in field_name straight into destination through atomic_file, hashing it
+    on the way. Nothing is spooled, at most chunk_size bytes wait in memory
+    for a write. A max_bytes of 0 means no limit, otherwise the file and the
+    body around it are cut off as soon as they go past it.
+    """
+    media_type, options = parse_options_header(content_type)
+    if media_type != b"multipart/form-data" or not options.get(b"boundary"):
+        raise InvalidUploadException("Expected a multipart/form-data body")
+    reader = _VideoPartReader(field_name)
+    parser = MultipartParser(options[b"boundary"], reader.callbacks())
+    max_body_bytes = max_bytes + MULTIPART_OVERHEAD_BYTES if max_bytes else 0
+    digest = hashlib.sha256()
+    size = 0
+    received = 0
+    with atomic_file(destination) as buffer:
+        async for chunk in stream:
+            received += len(chunk)
+            if max_body_bytes and received > max_body_bytes:
+                raise UploadTooLargeException(f"Request body is larger than {max_body_bytes} bytes")
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise InvalidUploadException(f"Invalid multipart body: {e}")
+            if max_bytes and size + reader.pending_bytes > max_bytes:
+                raise UploadTooLargeException(f"Upload is larger than {max_bytes} bytes")
+            if reader.pending_bytes >= chunk_size:
+                size += reader.pending_bytes
+                await run_in_threadpool(_write_chunk, buffer, digest, reader.take_pending())
+        if not reader.complete:
+            raise InvalidUploadException("Multipart body is incomplete")
+        if not reader.found:
+            raise InvalidUploadException("A file field is required")
+        if reader.pending_bytes:
+            size += reader.pending_bytes
+            await run_in_threadpool(_write_chunk, buffer, digest, reader.take_pending())
+    return ReceivedFile(StoredUpload(destination, size, digest.hexdigest()), reader.filename, reader.content_type)
@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+import os
+from datetime import datetime
+from typing import AsyncIterator
+
+from starlette.concurrency import run_in_threadpool
+
+from utils.constants.collection_name import CollectionName
+from utils.database.async_database import AsyncDatabase, create_async_database
+from utils.database.database import DATABASE_NAME
+from utils.logger.logger import logger
+from utils.video.upload import UploadTooLargeException
+
+# Sessions start and end unlocked, a PATCH holds the lock until it has recorded its new offset
+UNLOCKED = datetime(1970, 1, 1)
+
+
+def _write_at(path: str, offset: int, chunk: bytes):
+    with open(path, "r+b") as buffer:
+        buffer.seek(offset)
+        buffer.write(chunk)
+
+
+def truncate_part_file(path: str, offset: int):
+    # Bytes past the recorded offset were never counted, left by a writer whose lock ran out
+    with open(path, "r+b") as buffer:
+        buffer.truncate(offset)
+
+
+class PartFileWriter:
+    """
+    Writes one PATCH into the part file from the session's offset. written
+    counts only the bytes this writer put there and stays correct when the
+    stream fails midway, so the caller can record it whatever happened.
+    """
+
+    def __init__(self, path: str, offset: int):
+        self.path = path
+        self.offset = offset
+        self.written = 0
+
+    async def write_stream(self, stream: AsyncIterator[bytes], max_bytes: int = 0):
+        await run_in_threadpool(truncate_part_file, self.path, self.offset)
+        async for chunk in stream:
+            if not chunk:
+                continue
+            if max_bytes and self.offset + self.written + len(chunk) > max_bytes:
+                raise UploadTooLargeException(f"Upload is larger than {max_bytes} bytes")
+            await run_in_threadpool(_write_at, self.path, self.offset + self.written, chunk)
+            self.written += len(chunk)
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as buffer:
+        while chunk := buffer.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def sweep_expired_sessions(db: AsyncDatabase) -> int:
+    now = datetime.utcnow()
+    expired = await db.get_object(CollectionName.UPLOAD_SESSIONS.value,
+                                  {"expires_at": {"$lt": now}, "locked_until": {"$lt": now}},
+                                  projection={"part_path": 1})
+    for session in expired:
+        if session.get("part_path") and os.path.exists(session["part_path"]):
+            await run_in_threadpool(os.remove, session["part_path"])
+    if not expired:
+        return 0
+    return await db.delete_object(CollectionName.UPLOAD_SESSIONS.value,
+                                  {"_id": {"$in": [session["_id"] for session in expired]}},
+                                  deleted_at=datetime.utcnow())
+
+
+async def run_session_sweeper(interval_seconds: float):
+    while True:
+        try:
+            swept = await sweep_expired_sessions(create_async_database(DATABASE_NAME))
+            if swept:
+                logger.info(f"Removed {swept} expired upload sessions")
+        except Exception as e:
+            logger.error(f"Upload session sweep failed: {e}")
+        await asyncio.sleep(interval_seconds)